@@ -1,82 +1,82 @@
 """
 Management command to set up default groups and permissions
 """
+from django.apps import apps
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 
 
+# Custom permissions keyed by codename -> (app_label, model)
+CUSTOM_PERMISSIONS = {
+    'view_device_section': ('device', 'device'),
+    'manage_devices': ('device', 'device'),
+    'view_employee_section': ('employees', 'employee'),
+    'manage_employees': ('employees', 'employee'),
+    'manage_fingerprints': ('employees', 'employee'),
+    'view_attendance_section': ('attendance', 'attendanceevent'),
+    'manage_attendance': ('attendance', 'attendanceevent'),
+    'download_attendance': ('attendance', 'attendanceevent'),
+}
+
+# Default groups and the permission codenames assigned to each
+GROUP_PERMISSIONS = {
+    'Administrators': [
+        'view_device_section', 'manage_devices',
+        'view_employee_section', 'manage_employees', 'manage_fingerprints',
+        'view_attendance_section', 'manage_attendance', 'download_attendance',
+    ],
+    'HR Managers': [
+        'view_device_section',
+        'view_employee_section', 'manage_employees', 'manage_fingerprints',
+        'view_attendance_section', 'manage_attendance', 'download_attendance',
+    ],
+    'Device Managers': [
+        'view_device_section', 'manage_devices',
+        'view_employee_section',
+        'view_attendance_section',
+    ],
+    'Attendance Operators': [
+        'view_employee_section',
+        'view_attendance_section', 'download_attendance',
+    ],
+    'Viewers': [
+        'view_device_section',
+        'view_employee_section',
+        'view_attendance_section',
+    ],
+}
+
+
 class Command(BaseCommand):
     help = 'Sets up default permission groups'
 
     def handle(self, *args, **options):
         self.stdout.write('Setting up default permission groups...')
 
-        # Get content types
-        device_ct = ContentType.objects.get(app_label='device', model='device')
-        employee_ct = ContentType.objects.get(app_label='employees', model='employee')
-        attendance_ct = ContentType.objects.get(app_label='attendance', model='attendanceevent')
-
-        # Get our custom permissions
-        device_section_perm = Permission.objects.get(codename='view_device_section', content_type=device_ct)
-        manage_devices_perm = Permission.objects.get(codename='manage_devices', content_type=device_ct)
-
-        employee_section_perm = Permission.objects.get(codename='view_employee_section', content_type=employee_ct)
-        manage_employees_perm = Permission.objects.get(codename='manage_employees', content_type=employee_ct)
-        manage_fingerprints_perm = Permission.objects.get(codename='manage_fingerprints', content_type=employee_ct)
-
-        attendance_section_perm = Permission.objects.get(codename='view_attendance_section', content_type=attendance_ct)
-        manage_attendance_perm = Permission.objects.get(codename='manage_attendance', content_type=attendance_ct)
-        download_attendance_perm = Permission.objects.get(codename='download_attendance', content_type=attendance_ct)
-
-        # 1. Administrators Group
-        admin_group, created = Group.objects.get_or_create(name='Administrators')
-        admin_group.permissions.clear()
-        admin_group.permissions.add(
-            device_section_perm, manage_devices_perm,
-            employee_section_perm, manage_employees_perm, manage_fingerprints_perm,
-            attendance_section_perm, manage_attendance_perm, download_attendance_perm,
-        )
-        self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} Administrators group'))
-
-        # 2. HR Managers Group
-        hr_group, created = Group.objects.get_or_create(name='HR Managers')
-        hr_group.permissions.clear()
-        hr_group.permissions.add(
-            device_section_perm,
-            employee_section_perm, manage_employees_perm, manage_fingerprints_perm,
-            attendance_section_perm, manage_attendance_perm, download_attendance_perm,
-        )
-        self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} HR Managers group'))
-
-        # 3. Device Managers Group
-        device_manager_group, created = Group.objects.get_or_create(name='Device Managers')
-        device_manager_group.permissions.clear()
-        device_manager_group.permissions.add(
-            device_section_perm, manage_devices_perm,
-            employee_section_perm,
-            attendance_section_perm,
-        )
-        self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} Device Managers group'))
+        # Get content types through the ContentType cache, then all custom permissions in one query
+        model_classes = {key: apps.get_model(*key) for key in set(CUSTOM_PERMISSIONS.values())}
+        cached_cts = ContentType.objects.get_for_models(*model_classes.values())
+        content_types = {key: cached_cts[model] for key, model in model_classes.items()}
+        perms = {
+            (perm.content_type_id, perm.codename): perm
+            for perm in Permission.objects.filter(
+                codename__in=CUSTOM_PERMISSIONS.keys(),
+                content_type__in=content_types.values(),
+            )
+        }
 
-        # 4. Attendance Operators Group
-        attendance_operator_group, created = Group.objects.get_or_create(name='Attendance Operators')
-        attendance_operator_group.permissions.clear()
-        attendance_operator_group.permissions.add(
-            employee_section_perm,
-            attendance_section_perm, download_attendance_perm,
-        )
-        self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} Attendance Operators group'))
+        def get_perm(codename):
+            ct = content_types[CUSTOM_PERMISSIONS[codename]]
+            try:
+                return perms[(ct.pk, codename)]
+            except KeyError:
+                raise Permission.DoesNotExist(f'Permission {codename} does not exist')
 
-        # 5. Viewers Group
-        viewer_group, created = Group.objects.get_or_create(name='Viewers')
-        viewer_group.permissions.clear()
-        viewer_group.permissions.add(
-            device_section_perm,
-            employee_section_perm,
-            attendance_section_perm,
-        )
-        self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} Viewers group'))
+        for group_name, codenames in GROUP_PERMISSIONS.items():
+            group, created = Group.objects.get_or_create(name=group_name)
+            group.permissions.set([get_perm(codename) for codename in codenames])
+            self.stdout.write(self.style.SUCCESS(f'{"Created" if created else "Updated"} {group_name} group'))
 
         self.stdout.write(self.style.SUCCESS('\nSuccessfully set up all permission groups!'))
         self.stdout.write('\nAvailable groups:')
@@ -4,7 +4,6 @@ Permission mixins and decorators for role-based access control
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.core.exceptions import PermissionDenied
-from functools import wraps
 
 
 # Reusable mixins for class-based views
@@ -27,81 +26,18 @@ class AttendanceSectionMixin(LoginRequiredMixin, PermissionRequiredMixin):
 
 
 # Decorators for function-based views
-def device_section_required(view_func):
-    """Decorator to require device section permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('device.view_device_section', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def employee_section_required(view_func):
-    """Decorator to require employee section permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('employees.view_employee_section', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def attendance_section_required(view_func):
-    """Decorator to require attendance section permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('attendance.view_attendance_section', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def manage_devices_required(view_func):
-    """Decorator to require device management permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('device.manage_devices', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def manage_employees_required(view_func):
-    """Decorator to require employee management permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('employees.manage_employees', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def manage_fingerprints_required(view_func):
-    """Decorator to require fingerprint management permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('employees.manage_fingerprints', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def manage_attendance_required(view_func):
-    """Decorator to require attendance management permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('attendance.manage_attendance', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-
-def download_attendance_required(view_func):
-    """Decorator to require attendance download permission"""
-    @wraps(view_func)
-    @login_required
-    @permission_required('attendance.download_attendance', raise_exception=True)
-    def wrapper(request, *args, **kwargs):
-        return view_func(request, *args, **kwargs)
-    return wrapper
+def section_permission_required(perm):
+    """Build a decorator that requires login and the given permission"""
+    def decorator(view_func):
+        return login_required(permission_required(perm, raise_exception=True)(view_func))
+    return decorator
+
+
+device_section_required = section_permission_required('device.view_device_section')
+employee_section_required = section_permission_required('employees.view_employee_section')
+attendance_section_required = section_permission_required('attendance.view_attendance_section')
+manage_devices_required = section_permission_required('device.manage_devices')
+manage_employees_required = section_permission_required('employees.manage_employees')
+manage_fingerprints_required = section_permission_required('employees.manage_fingerprints')
+manage_attendance_required = section_permission_required('attendance.manage_attendance')
+download_attendance_required = section_permission_required('attendance.download_attendance')
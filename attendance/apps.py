@@ -6,3 +6,6 @@ class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
     verbose_name = _('Attendance')
+
+    def ready(self):
+        from . import signals  # noqa: F401
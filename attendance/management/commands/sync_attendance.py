@@ -2,12 +2,22 @@
 Management command to download attendance events from device
 """
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 from attendance.models import AttendanceEvent
+from attendance.reports import invalidate_summary_cache
 from employees.models import Employee
 from device.models import Device
 from device.zk_connector import ZKDeviceConnector
 
+BATCH_SIZE = 1000
+
+
+def chunks(seq, size):
+    """Yield successive slices of seq with at most size items"""
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
 
 class Command(BaseCommand):
     help = 'Download attendance events from ZKTeco device'
@@ -45,50 +55,47 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Downloading attendance from: {device.name} ({device.ip_address})')
 
-        success_count = 0
-        duplicate_count = 0
-        error_count = 0
-
         try:
             conn = connector.connect()
             attendance_records = connector.get_attendance(conn)
 
             self.stdout.write(f'Found {len(attendance_records)} attendance records on device')
 
-            for record in attendance_records:
-                try:
-                    # Try to match employee
-                    employee = None
-                    try:
-                        employee = Employee.objects.get(user_id=record.user_id)
-                    except Employee.DoesNotExist:
-                        self.stdout.write(
-                            self.style.WARNING(f'  No employee found for user_id {record.user_id}')
+            # Match all employees in a single query
+            user_ids = {record.user_id for record in attendance_records}
+            emp_map = Employee.objects.in_bulk(user_ids, field_name='user_id')
+
+            unmatched = sorted(user_ids - emp_map.keys())
+            if unmatched:
+                self.stdout.write(self.style.WARNING('\n'.join(
+                    f'  No employee found for user_id {user_id}' for user_id in unmatched
+                )))
+
+            # Duplicates are skipped by the (device, user_id, timestamp) unique constraint.
+            # Records are inserted in chunks inside one transaction so memory stays
+            # bounded. Locking the device row makes concurrent downloads from the
+            # same device run one at a time, so the count delta only covers this run.
+            with transaction.atomic():
+                Device.objects.select_for_update().only('pk').get(pk=device.pk)
+                existing_count = AttendanceEvent.objects.filter(device=device).count()
+                for batch in chunks(attendance_records, BATCH_SIZE):
+                    AttendanceEvent.objects.bulk_create([
+                        AttendanceEvent(
+                            device=device,
+                            user_id=record.user_id,
+                            timestamp=record.timestamp,
+                            employee=emp_map.get(record.user_id),
+                            punch_type=record.punch,
+                            verify_mode=getattr(record, 'status', 0),
+                            work_code=0,
                         )
-
-                    # Create or skip if duplicate
-                    event, created = AttendanceEvent.objects.get_or_create(
-                        device=device,
-                        user_id=record.user_id,
-                        timestamp=record.timestamp,
-                        defaults={
-                            'employee': employee,
-                            'punch_type': record.punch,
-                            'verify_mode': getattr(record, 'status', 0),
-                            'work_code': 0,
-                        }
-                    )
-
-                    if created:
-                        success_count += 1
-                        emp_name = employee.full_name if employee else f'User {record.user_id}'
-                        self.stdout.write(f'  + {record.timestamp} - {emp_name}')
-                    else:
-                        duplicate_count += 1
-
-                except Exception as e:
-                    error_count += 1
-                    self.stdout.write(self.style.ERROR(f'  ✗ Error: {e}'))
+                        for record in batch
+                    ], ignore_conflicts=True)
+                success_count = AttendanceEvent.objects.filter(device=device).count() - existing_count
+                linked_count = AttendanceEvent.link_unmatched_employees(device)
+            duplicate_count = len(attendance_records) - success_count
+            if success_count > 0 or linked_count > 0:
+                invalidate_summary_cache()
 
             # Clear device if requested
             if clear_device and success_count > 0:
@@ -99,15 +106,15 @@ class Command(BaseCommand):
             conn.disconnect()
 
             device.last_sync = timezone.now()
-            device.save()
+            device.save(update_fields=['last_sync', 'updated_at'])
 
             # Summary
             self.stdout.write('\n' + '=' * 50)
             self.stdout.write(self.style.SUCCESS(f'✓ Downloaded: {success_count} new records'))
             if duplicate_count > 0:
                 self.stdout.write(f'  Skipped: {duplicate_count} duplicates')
-            if error_count > 0:
-                self.stdout.write(self.style.ERROR(f'  Errors: {error_count}'))
+            if linked_count > 0:
+                self.stdout.write(f'  Linked: {linked_count} earlier events to employees')
             self.stdout.write('=' * 50)
 
         except Exception as e:
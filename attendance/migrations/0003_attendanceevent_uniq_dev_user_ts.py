@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_alter_attendanceevent_options'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='attendanceevent',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='attendanceevent',
+            constraint=models.UniqueConstraint(fields=('device', 'user_id', 'timestamp'), name='uniq_dev_user_ts'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendanceevent_uniq_dev_user_ts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendanceevent',
+            index=models.Index(fields=['device', '-timestamp'], name='attendance__device__dcb0e8_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from device.models import Device
 from employees.models import Employee
@@ -14,6 +16,17 @@ class AttendanceEvent(models.Model):
         (4, _('Overtime In')),
         (5, _('Overtime Out')),
     )
+    PUNCH_TYPE_MAP = dict(PUNCH_TYPES)
+
+    VERIFY_MODES = {
+        0: _('Password'),
+        1: _('Fingerprint'),
+        2: _('Card'),
+        3: _('Face'),
+        4: _('Iris'),
+        15: _('Others'),
+    }
+    VERIFY_MODE_UNKNOWN = _('Unknown')
 
     device = models.ForeignKey(Device, on_delete=models.CASCADE, verbose_name=_("Device"))
     employee = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Employee"))
@@ -25,11 +38,14 @@ class AttendanceEvent(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
 
     class Meta:
-        unique_together = ['device', 'user_id', 'timestamp']
         ordering = ['-timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['device', 'user_id', 'timestamp'], name='uniq_dev_user_ts'),
+        ]
         indexes = [
             models.Index(fields=['-timestamp']),
             models.Index(fields=['employee', '-timestamp']),
+            models.Index(fields=['device', '-timestamp']),
         ]
         verbose_name = _('Attendance Event')
         verbose_name_plural = _('Attendance Events')
@@ -40,17 +56,30 @@ class AttendanceEvent(models.Model):
         ]
 
     def __str__(self):
-        employee_name = self.employee.full_name if self.employee else f'User {self.user_id}'
-        return f"{employee_name} - {self.get_punch_type_display()} at {self.timestamp}"
+        punch_type = self.PUNCH_TYPE_MAP.get(self.punch_type, self.punch_type)
+        return f"{self.display_name} - {punch_type} at {self.timestamp}"
+
+    @cached_property
+    def display_name(self):
+        """Employee name, or the device user ID when no employee is matched"""
+        return self.employee.full_name if self.employee_id else f'User {self.user_id}'
+
+    @classmethod
+    def link_unmatched_employees(cls, device):
+        """
+        Attach employees to a device's unmatched events in a single UPDATE
+
+        Picks up employees created after their punches were downloaded.
+
+        Returns:
+            int: Number of events linked
+        """
+        return cls.objects.filter(
+            device=device, employee__isnull=True, user_id__in=Employee.objects.values('user_id')
+        ).update(
+            employee=Subquery(Employee.objects.filter(user_id=OuterRef('user_id')).values('pk')[:1])
+        )
 
     def get_verify_mode_display_custom(self):
         """Get human-readable verify mode"""
-        modes = {
-            0: _('Password'),
-            1: _('Fingerprint'),
-            2: _('Card'),
-            3: _('Face'),
-            4: _('Iris'),
-            15: _('Others'),
-        }
-        return modes.get(self.verify_mode, _('Unknown'))
+        return self.VERIFY_MODES.get(self.verify_mode, self.VERIFY_MODE_UNKNOWN)
@@ -1,28 +1,100 @@
 """
 Helper functions for generating attendance reports with event pairing logic
 """
+import calendar
+from bisect import bisect_left
 from datetime import datetime, timedelta, time
-from django.db.models import Count, Q
+from itertools import groupby
+from operator import itemgetter
+from time import time_ns
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import TruncDate
 from django.utils import timezone
+from employees.models import Employee
 from .models import AttendanceEvent
 
+# Only events between these times (inclusive) are counted in reports
+WORKING_HOURS = (time(6, 0), time(22, 0))
 
-def filter_working_hours(events):
+# Minimum gap between a clock-in and its clock-out
+MIN_PAIR_GAP = timedelta(minutes=30)
+
+# Columns needed to build report pairs; skips unused event/device columns
+REPORT_FIELDS = (
+    'device', 'employee', 'user_id', 'timestamp', 'punch_type', 'verify_mode',
+    'device__name',
+)
+
+# Employee columns needed for report names and CSV employee IDs
+REPORT_EMPLOYEE_FIELDS = ('id', 'employee_id', 'first_name', 'last_name')
+
+
+def report_events():
     """
-    Filter events to only include those between 6:00 and 22:00
+    Base AttendanceEvent queryset for reports and exports
 
-    Args:
-        events: QuerySet of AttendanceEvent objects
+    Employees are prefetched with a single IN query instead of being joined
+    onto every event row, since events vastly outnumber employees.
+    """
+    return AttendanceEvent.objects.select_related('device').prefetch_related(
+        Prefetch('employee', queryset=Employee.objects.only(*REPORT_EMPLOYEE_FIELDS))
+    ).only(*REPORT_FIELDS)
 
-    Returns:
-        Filtered list of events within working hours
+
+# Report summary caching. Closed periods rarely change, so they are kept longer;
+# new events, edits and deletes bump the version so changes show up immediately.
+# Results are only cached in a cache shared by every process (e.g. Redis): with a
+# per-process cache, a bump made by a task or management command would never
+# reach the web workers.
+SUMMARY_CACHE_VERSION_KEY = 'attendance:summary_version'
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+SUMMARY_CACHE_TIMEOUT_CURRENT = 60
+
+# Backends whose contents are private to one process
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def shared_cache_enabled():
+    """True when the default cache is shared between processes"""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def summary_cache_version():
     """
-    filtered = []
-    for event in events:
-        event_time = event.timestamp.time()
-        if time(6, 0) <= event_time <= time(22, 0):
-            filtered.append(event)
-    return filtered
+    Current summary cache version
+
+    A missing (evicted) version restarts from the clock in nanoseconds, which is
+    always past any earlier version, so old entries can never match again.
+    """
+    return cache.get_or_set(SUMMARY_CACHE_VERSION_KEY, time_ns, None)
+
+
+def invalidate_summary_cache():
+    """Invalidate all cached report summaries (call after events change)"""
+    try:
+        cache.incr(SUMMARY_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(SUMMARY_CACHE_VERSION_KEY, time_ns(), None)
+
+
+def _cached_summary(kind, start_date, end_date, employee, device, build):
+    """Return a cached summary keyed by period and filters, building it on a miss"""
+    if not shared_cache_enabled():
+        return build()
+    key = (
+        f'attendance:{kind}:v{summary_cache_version()}:{start_date}:{end_date}:'
+        f'{employee.pk if employee else ""}:{device.pk if device else ""}'
+    )
+    if end_date < timezone.localdate():
+        timeout = SUMMARY_CACHE_TIMEOUT
+    else:
+        timeout = SUMMARY_CACHE_TIMEOUT_CURRENT
+    return cache.get_or_set(key, build, timeout)
 
 
 def pair_events(events):
@@ -38,41 +110,73 @@ def pair_events(events):
     Returns:
         List of tuples: [(event1, event2, duration_minutes), ...]
     """
-    if len(events) < 2:
-        return []
-
     # Sort events by timestamp
     sorted_events = sorted(events, key=lambda e: e.timestamp)
+    timestamps = [event.timestamp for event in sorted_events]
+
+    return [
+        (sorted_events[i], sorted_events[j], (timestamps[j] - timestamps[i]).total_seconds() / 60)
+        for i, j in _pair_indices(timestamps)
+    ]
+
 
+def _pair_indices(timestamps):
+    """
+    Index pairs (in, out) produced by the pairing rules in pair_events
+
+    Args:
+        timestamps: Sorted list of datetimes
+    """
+    count = len(timestamps)
     pairs = []
     i = 0
 
-    while i < len(sorted_events) - 1:
-        first_event = sorted_events[i]
-        j = i + 1
-
-        # Try to find a valid pair
-        while j < len(sorted_events):
-            second_event = sorted_events[j]
-            delta = second_event.timestamp - first_event.timestamp
-            delta_minutes = delta.total_seconds() / 60
-
-            # If delta is at least 30 minutes, we have a valid pair
-            if delta_minutes >= 30:
-                pairs.append((first_event, second_event, delta_minutes))
-                i = j + 1  # Move to next unpaired event
-                break
-            else:
-                # Skip this event and try the next one
-                j += 1
-
-        # If no valid pair found, move to next event
-        if j >= len(sorted_events):
-            i += 1
+    while i < count - 1:
+        # First later event at least 30 minutes after this one; closer events are skipped
+        j = bisect_left(timestamps, timestamps[i] + MIN_PAIR_GAP, i + 1)
+        if j >= count:
+            # Every later event is within 30 minutes of this one, so none can pair
+            break
+
+        pairs.append((i, j))
+        i = j + 1  # Move to next unpaired event
 
     return pairs
 
 
+def _group_key(event):
+    """Summary key for an event: the employee pk, or the device user ID if unmatched"""
+    return event.employee_id or f'user_{event.user_id}'
+
+
+def _employee_day_summary(events, date):
+    """
+    Build the summary entry for one employee's events on one day
+
+    Args:
+        events: AttendanceEvent objects for a single employee/day
+        date: The day the events belong to
+    """
+    pairs = pair_events(events)
+
+    # Calculate totals
+    total_work_minutes = sum(duration for _, _, duration in pairs)
+    total_work_hours = total_work_minutes / 60
+
+    return {
+        'employee': events[0].employee,
+        'name': events[0].display_name,
+        'date': date,
+        'pairs': pairs,
+        'total_pairs': len(pairs),
+        'total_work_minutes': total_work_minutes,
+        'total_work_hours': round(total_work_hours, 2),
+        'first_entry': pairs[0][0].timestamp if pairs else None,
+        'last_exit': pairs[-1][1].timestamp if pairs else None,
+        'unpaired_events': len(events) - (len(pairs) * 2),
+    }
+
+
 def get_daily_summary(date, employee=None, device=None):
     """
     Get attendance summary for a specific day with event pairing
@@ -85,54 +189,34 @@ def get_daily_summary(date, employee=None, device=None):
     Returns:
         Dictionary with employee summaries including paired events
     """
-    start = datetime.combine(date, datetime.min.time())
-    end = datetime.combine(date, datetime.max.time())
+    return _cached_summary(
+        'daily', date, date, employee, device,
+        lambda: _build_daily_summary(date, employee, device),
+    )
 
-    events = AttendanceEvent.objects.filter(
-        timestamp__range=(start, end)
-    ).select_related('employee', 'device').order_by('employee', 'timestamp')
+
+def _build_daily_summary(date, employee, device):
+    """Compute the daily summary returned by get_daily_summary"""
+    # Half-open [start, next day) interval keeps the timestamp index usable
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    end = start + timedelta(days=1)
+
+    events = report_events().filter(
+        timestamp__gte=start, timestamp__lt=end
+    ).order_by('employee', 'user_id', 'timestamp')
 
     if employee:
         events = events.filter(employee=employee)
     if device:
         events = events.filter(device=device)
 
-    # Filter to working hours (6:00-22:00)
-    events = filter_working_hours(events)
-
-    # Group by employee
-    employee_events = {}
-    for event in events:
-        emp_id = event.employee.id if event.employee else f'user_{event.user_id}'
-        if emp_id not in employee_events:
-            employee_events[emp_id] = {
-                'employee': event.employee,
-                'name': event.employee.full_name if event.employee else f'User {event.user_id}',
-                'events': []
-            }
-        employee_events[emp_id]['events'].append(event)
-
-    # Generate summary with pairs
+    # Filter to working hours (6:00-22:00) in SQL
+    events = events.filter(timestamp__time__range=WORKING_HOURS)
+
+    # Rows arrive ordered by employee, so each group is one contiguous run
     summary = {}
-    for emp_id, data in employee_events.items():
-        pairs = pair_events(data['events'])
-
-        # Calculate totals
-        total_work_minutes = sum(duration for _, _, duration in pairs)
-        total_work_hours = total_work_minutes / 60
-
-        summary[emp_id] = {
-            'employee': data['employee'],
-            'name': data['name'],
-            'date': date,
-            'pairs': pairs,
-            'total_pairs': len(pairs),
-            'total_work_minutes': total_work_minutes,
-            'total_work_hours': round(total_work_hours, 2),
-            'first_entry': pairs[0][0].timestamp if pairs else None,
-            'last_exit': pairs[-1][1].timestamp if pairs else None,
-            'unpaired_events': len(data['events']) - (len(pairs) * 2),
-        }
+    for emp_id, group in groupby(events.iterator(chunk_size=2000), key=_group_key):
+        summary[emp_id] = _employee_day_summary(list(group), date)
 
     return summary
 
@@ -150,81 +234,72 @@ def get_date_range_summary(start_date, end_date, employee=None, device=None):
     Returns:
         Dictionary with date -> employee summaries
     """
-    start = datetime.combine(start_date, datetime.min.time())
-    end = datetime.combine(end_date, datetime.max.time())
+    return _cached_summary(
+        'range', start_date, end_date, employee, device,
+        lambda: _build_date_range_summary(start_date, end_date, employee, device),
+    )
+
+
+def _build_date_range_summary(start_date, end_date, employee, device):
+    """Compute the date range summary returned by get_date_range_summary"""
+    summary = {}
+    for date, emp_id, row in iter_date_range_summary(start_date, end_date, employee, device):
+        summary.setdefault(date, {})[emp_id] = row
+    return summary
 
-    events = AttendanceEvent.objects.filter(
-        timestamp__range=(start, end)
-    ).select_related('employee', 'device').order_by('timestamp')
+
+def iter_date_range_summary(start_date, end_date, employee=None, device=None):
+    """
+    Yield (date, emp_id, summary) for each employee/day in a date range
+
+    Uncached counterpart of get_date_range_summary for callers that consume the rows
+    once, such as CSV exports; only one employee/day of events is held at a time.
+    Rows are yielded in date order.
+    """
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+    # Bucket events by day in SQL so rows arrive already grouped by date/employee
+    events = report_events().filter(
+        timestamp__gte=start, timestamp__lt=end
+    ).annotate(
+        day=TruncDate('timestamp')
+    ).order_by('day', 'employee', 'user_id', 'timestamp')
 
     if employee:
         events = events.filter(employee=employee)
     if device:
         events = events.filter(device=device)
 
-    # Filter to working hours
-    events = filter_working_hours(events)
-
-    # Group by date and employee
-    date_employee_events = {}
-    for event in events:
-        event_date = event.timestamp.date()
-        emp_id = event.employee.id if event.employee else f'user_{event.user_id}'
+    # Filter to working hours in SQL
+    events = events.filter(timestamp__time__range=WORKING_HOURS)
 
-        if event_date not in date_employee_events:
-            date_employee_events[event_date] = {}
+    # Rows arrive ordered by day and employee, so each group is one contiguous run
+    for (date, emp_id), group in groupby(
+        events.iterator(chunk_size=2000), key=lambda event: (event.day, _group_key(event))
+    ):
+        yield date, emp_id, _employee_day_summary(list(group), date)
 
-        if emp_id not in date_employee_events[event_date]:
-            date_employee_events[event_date][emp_id] = {
-                'employee': event.employee,
-                'name': event.employee.full_name if event.employee else f'User {event.user_id}',
-                'events': []
-            }
 
-        date_employee_events[event_date][emp_id]['events'].append(event)
+def week_bounds(start_date):
+    """(start, end) dates covered by a weekly report starting on start_date"""
+    return start_date, start_date + timedelta(days=7)
 
-    # Generate summary with pairs for each date/employee combination
-    summary = {}
-    for date, employees in sorted(date_employee_events.items()):
-        summary[date] = {}
-
-        for emp_id, data in employees.items():
-            pairs = pair_events(data['events'])
-
-            total_work_minutes = sum(duration for _, _, duration in pairs)
-            total_work_hours = total_work_minutes / 60
-
-            summary[date][emp_id] = {
-                'employee': data['employee'],
-                'name': data['name'],
-                'date': date,
-                'pairs': pairs,
-                'total_pairs': len(pairs),
-                'total_work_minutes': total_work_minutes,
-                'total_work_hours': round(total_work_hours, 2),
-                'first_entry': pairs[0][0].timestamp if pairs else None,
-                'last_exit': pairs[-1][1].timestamp if pairs else None,
-                'unpaired_events': len(data['events']) - (len(pairs) * 2),
-            }
 
-    return summary
+def month_bounds(year, month):
+    """(first, last) dates of a month"""
+    start_date = datetime(year, month, 1).date()
+    return start_date, start_date.replace(day=calendar.monthrange(year, month)[1])
 
 
 def get_weekly_summary(start_date, employee=None, device=None):
     """Get attendance summary for a week"""
-    end_date = start_date + timedelta(days=7)
-    return get_date_range_summary(start_date, end_date, employee, device)
+    return get_date_range_summary(*week_bounds(start_date), employee, device)
 
 
 def get_monthly_summary(year, month, employee=None, device=None):
     """Get attendance summary for a month"""
-    start_date = datetime(year, month, 1).date()
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-    else:
-        end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
-
-    return get_date_range_summary(start_date, end_date, employee, device)
+    return get_date_range_summary(*month_bounds(year, month), employee, device)
 
 
 def get_employee_summary_for_period(employee, start_date, end_date):
@@ -234,16 +309,30 @@ def get_employee_summary_for_period(employee, start_date, end_date):
     Returns:
         Dictionary with aggregate statistics
     """
-    date_range_data = get_date_range_summary(start_date, end_date, employee=employee)
-
-    total_days_present = len(date_range_data)
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+    # Only the timestamps are needed for totals, so skip building model instances
+    # and the per-day summary dicts
+    rows = AttendanceEvent.objects.filter(
+        employee=employee, timestamp__gte=start, timestamp__lt=end,
+        timestamp__time__range=WORKING_HOURS,
+    ).annotate(
+        day=TruncDate('timestamp')
+    ).order_by('day', 'timestamp').values_list('day', 'timestamp')
+
+    total_days_present = 0
     total_work_hours = 0
     total_pairs = 0
 
-    for date, employees in date_range_data.items():
-        for emp_id, data in employees.items():
-            total_work_hours += data['total_work_hours']
-            total_pairs += data['total_pairs']
+    for _, day_rows in groupby(rows.iterator(chunk_size=2000), key=itemgetter(0)):
+        timestamps = [timestamp for _, timestamp in day_rows]
+        pairs = _pair_indices(timestamps)
+        day_minutes = sum((timestamps[j] - timestamps[i]).total_seconds() / 60 for i, j in pairs)
+
+        total_days_present += 1
+        total_work_hours += round(day_minutes / 60, 2)
+        total_pairs += len(pairs)
 
     total_days_in_range = (end_date - start_date).days + 1
 
@@ -0,0 +1,33 @@
+"""
+Signal handlers for the attendance app
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from device.models import Device
+from employees.models import Employee
+from .models import AttendanceEvent
+from .reports import invalidate_summary_cache
+from .utils import invalidate_filter_choices
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver([post_save, post_delete], sender=Device)
+def clear_filter_choices(sender, **kwargs):
+    """Refresh the cached filter selects when an employee or device changes"""
+    invalidate_filter_choices()
+
+
+@receiver([post_save, post_delete], sender=AttendanceEvent)
+def clear_summaries_for_event(sender, origin=None, **kwargs):
+    """Drop cached report summaries when an event is edited or deleted"""
+    # Deleting a device removes all its events; clear_summaries runs once for it
+    if isinstance(origin, Device):
+        return
+    invalidate_summary_cache()
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver(post_delete, sender=Device)
+def clear_summaries(sender, **kwargs):
+    """Drop cached report summaries when an employee changes or a device is deleted"""
+    invalidate_summary_cache()
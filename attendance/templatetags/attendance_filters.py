@@ -6,7 +6,7 @@ from django import template
 register = template.Library()
 
 
-@register.filter
+@register.filter(is_safe=True)
 def minutes_to_hours_minutes(minutes):
     """
     Convert minutes to formatted hours and minutes string
@@ -16,10 +16,6 @@ def minutes_to_hours_minutes(minutes):
         120 -> "2h 0m"
         45 -> "0h 45m"
     """
-    if not minutes:
-        return "0h 0m"
-
-    hours = int(minutes // 60)
-    remaining_minutes = int(minutes % 60)
+    hours, remaining_minutes = divmod(int(minutes or 0), 60)
 
     return f"{hours}h {remaining_minutes}m"
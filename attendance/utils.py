@@ -0,0 +1,75 @@
+"""
+Cached lookups for the attendance views
+"""
+import hashlib
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from device.models import Device
+from employees.models import Employee
+from .reports import shared_cache_enabled, summary_cache_version
+
+ACTIVE_EMPLOYEES_CACHE_KEY = 'attendance:active_employees'
+ACTIVE_DEVICES_CACHE_KEY = 'attendance:active_devices'
+
+# Upper bound on staleness for changes that bypass model signals (e.g. queryset.update())
+FILTER_CHOICES_TIMEOUT = 300
+
+
+def _filter_choices(key, build):
+    """
+    Cache a filter select list, but only in a cache shared by every process
+
+    Employee and device changes made by imports, tasks and management commands
+    run in other processes, so with a per-process cache the signal handlers
+    could never clear the copies held by the web workers.
+    """
+    if not shared_cache_enabled():
+        return build()
+    return cache.get_or_set(key, build, FILTER_CHOICES_TIMEOUT)
+
+
+def active_employees():
+    """Active employees with only the columns the filter selects render"""
+    return _filter_choices(
+        ACTIVE_EMPLOYEES_CACHE_KEY,
+        lambda: list(Employee.objects.filter(is_active=True).only('id', 'employee_id', 'first_name', 'last_name')),
+    )
+
+
+def active_devices():
+    """Active devices with only the columns the filter selects render"""
+    return _filter_choices(
+        ACTIVE_DEVICES_CACHE_KEY,
+        lambda: list(Device.objects.filter(is_active=True).only('id', 'name', 'ip_address')),
+    )
+
+
+def invalidate_filter_choices():
+    """Drop the cached employee and device lists"""
+    cache.delete_many([ACTIVE_EMPLOYEES_CACHE_KEY, ACTIVE_DEVICES_CACHE_KEY])
+
+
+# Event list counts are reused briefly across page clicks
+LIST_COUNT_CACHE_TIMEOUT = 60
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that caches the filtered COUNT(*) for each distinct query
+
+    The key includes the summary cache version, which event changes bump, so
+    new events show up in the page count right away. Counts are only cached in
+    a cache shared by every process; otherwise each page counts as usual.
+    """
+
+    @cached_property
+    def count(self):
+        if not shared_cache_enabled():
+            return super().count
+        query_hash = hashlib.md5(str(self.object_list.query).encode()).hexdigest()
+        return cache.get_or_set(
+            f'attendance:list_count:v{summary_cache_version()}:{query_hash}',
+            lambda: super(CachedCountPaginator, self).count,
+            LIST_COUNT_CACHE_TIMEOUT,
+        )
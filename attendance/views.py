@@ -1,14 +1,23 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.views.decorators.gzip import gzip_page
 from django.views.generic import ListView
-from django.db.models import Q
-from django.http import HttpResponse
+from django.db import connection, transaction
+from django.db.models import Case, CharField, F, Func, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from itertools import islice
 import csv
+import tempfile
 
 from .models import AttendanceEvent
-from .reports import get_daily_summary, get_weekly_summary, get_monthly_summary, get_date_range_summary
+from .reports import (
+    report_events, invalidate_summary_cache,
+    get_daily_summary, get_date_range_summary, iter_date_range_summary, week_bounds, month_bounds
+)
+from .utils import CachedCountPaginator, active_devices, active_employees
 from employees.models import Employee
 from device.models import Device
 from device.zk_connector import ZKDeviceConnector
@@ -18,15 +27,107 @@ from accounts.permissions import (
 )
 
 
+def _day_start(date_str):
+    """Aware datetime for the start of a YYYY-MM-DD day, or None if the string is invalid"""
+    try:
+        day = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _filter_date_range(queryset, date_from_str, date_to_str):
+    """
+    Filter events to the days from date_from_str to date_to_str inclusive
+
+    Bounds are compared as aware datetimes so the timestamp index can be used;
+    missing or invalid bounds are ignored.
+    """
+    if date_from_str:
+        start = _day_start(date_from_str)
+        if start:
+            queryset = queryset.filter(timestamp__gte=start)
+
+    if date_to_str:
+        end = _day_start(date_to_str)
+        if end:
+            queryset = queryset.filter(timestamp__lt=end + timedelta(days=1))
+
+    return queryset
+
+
+def _copy_export_response(queryset, header, filename):
+    """
+    Build the attendance CSV on PostgreSQL with COPY ... TO STDOUT
+
+    The server formats every row itself, so no model instances are created.
+    Output is spooled to a temporary file, which only stays in memory while small,
+    and is then streamed to the client.
+    """
+    punch_labels = [
+        When(punch_type=value, then=Value(str(label)))
+        for value, label in AttendanceEvent.PUNCH_TYPE_MAP.items()
+    ]
+    verify_labels = [
+        When(verify_mode=value, then=Value(str(label)))
+        for value, label in AttendanceEvent.VERIFY_MODES.items()
+    ]
+    rows = queryset.annotate(
+        export_date=Func(F('timestamp'), Value('YYYY-MM-DD'), function='to_char', output_field=CharField()),
+        export_time=Func(F('timestamp'), Value('HH24:MI:SS'), function='to_char', output_field=CharField()),
+        export_employee_id=Coalesce('employee__employee_id', Value('')),
+        export_name=Case(
+            When(employee__isnull=False, then=Concat('employee__first_name', Value(' '), 'employee__last_name')),
+            default=Concat(Value('User '), Cast('user_id', CharField())),
+            output_field=CharField(),
+        ),
+        export_punch=Case(*punch_labels, default=Cast('punch_type', CharField()), output_field=CharField()),
+        export_verify=Case(
+            *verify_labels, default=Value(str(AttendanceEvent.VERIFY_MODE_UNKNOWN)), output_field=CharField()
+        ),
+    ).values_list(
+        'export_date', 'export_time', 'export_employee_id', 'export_name',
+        'user_id', 'export_punch', 'export_verify', 'device__name',
+    )
+    sql, params = rows.query.sql_with_params()
+
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    header_writer = csv.writer(Echo(), lineterminator='\n')
+    output.write(header_writer.writerow(header).encode())
+    with connection.cursor() as cursor:
+        cursor.copy_expert(cursor.mogrify(f'COPY ({sql}) TO STDOUT WITH CSV', params), output)
+    output.seek(0)
+
+    return FileResponse(output, as_attachment=True, filename=filename, content_type='text/csv')
+
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+
+# CSV lines sent per streamed chunk; gzip flushes once per chunk, so single rows compress poorly
+STREAM_ROWS_PER_CHUNK = 100
+
+
+def _chunked_lines(lines):
+    """Join streamed CSV lines into chunks of STREAM_ROWS_PER_CHUNK rows"""
+    lines = iter(lines)
+    while chunk := ''.join(islice(lines, STREAM_ROWS_PER_CHUNK)):
+        yield chunk
+
+
 class AttendanceListView(AttendanceSectionMixin, ListView):
     """List all attendance events with filters"""
     model = AttendanceEvent
     template_name = 'attendance/attendance_list.html'
     context_object_name = 'events'
     paginate_by = 50
+    paginator_class = CachedCountPaginator
 
     def get_queryset(self):
-        queryset = super().get_queryset().select_related('employee', 'device')
+        queryset = report_events()
 
         # Filter by employee
         employee_id = self.request.GET.get('employee')
@@ -38,38 +139,47 @@ class AttendanceListView(AttendanceSectionMixin, ListView):
         if device_id:
             queryset = queryset.filter(device_id=device_id)
 
-        # Filter by date range - Fixed to properly handle date boundaries
-        date_from_str = self.request.GET.get('date_from')
-        date_to_str = self.request.GET.get('date_to')
-
-        if date_from_str:
-            try:
-                date_from = datetime.strptime(date_from_str, '%Y-%m-%d')
-                # Start of day
-                queryset = queryset.filter(timestamp__gte=date_from)
-            except ValueError:
-                pass
-
-        if date_to_str:
-            try:
-                date_to = datetime.strptime(date_to_str, '%Y-%m-%d')
-                # End of day (23:59:59)
-                date_to_end = date_to.replace(hour=23, minute=59, second=59)
-                queryset = queryset.filter(timestamp__lte=date_to_end)
-            except ValueError:
-                pass
+        # Filter by date range as a half-open [date_from, date_to + 1 day) interval
+        queryset = _filter_date_range(
+            queryset, self.request.GET.get('date_from'), self.request.GET.get('date_to')
+        )
 
         # Filter by punch type
         punch_type = self.request.GET.get('punch_type')
         if punch_type:
             queryset = queryset.filter(punch_type=punch_type)
 
-        return queryset
+        # pk tie-breaker gives a stable order for keyset pagination
+        return queryset.order_by('-timestamp', '-pk')
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Following a Next link (?after=<pk of the previous page's last event>) seeks
+        past that row instead of using OFFSET, so deep pages don't scan every
+        skipped row. Direct page jumps still use OFFSET.
+        """
+        paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+
+        after = self.request.GET.get('after')
+        if after and page.number > 1:
+            try:
+                cursor = AttendanceEvent.objects.filter(pk=int(after)).values_list('timestamp', flat=True).first()
+            except ValueError:
+                cursor = None
+            if cursor is not None:
+                object_list = queryset.filter(
+                    Q(timestamp__lt=cursor) | Q(timestamp=cursor, pk__lt=int(after))
+                )[:page_size]
+                page.object_list = object_list
+
+        return paginator, page, object_list, is_paginated
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['employees'] = Employee.objects.filter(is_active=True)
-        context['devices'] = Device.objects.filter(is_active=True)
+        page_events = list(context['events'])
+        context['next_cursor'] = page_events[-1].pk if page_events else None
+        context['employees'] = active_employees()
+        context['devices'] = active_devices()
         context['punch_types'] = AttendanceEvent.PUNCH_TYPES
         return context
 
@@ -90,54 +200,47 @@ def download_attendance(request):
 
     connector = ZKDeviceConnector(device)
 
-    success_count = 0
-    error_count = 0
-    duplicate_count = 0
-
     try:
         conn = connector.connect()
         attendance_records = connector.get_attendance(conn)
         conn.disconnect()
 
-        for record in attendance_records:
-            try:
-                # Try to match employee
-                employee = None
-                try:
-                    employee = Employee.objects.get(user_id=record.user_id)
-                except Employee.DoesNotExist:
-                    pass
-
-                # Create or skip if duplicate
-                _, created = AttendanceEvent.objects.get_or_create(
+        # Match all employees in a single query
+        user_ids = {record.user_id for record in attendance_records}
+        emp_by_user = Employee.objects.in_bulk(user_ids, field_name='user_id')
+
+        # Duplicates are skipped by the (device, user_id, timestamp) unique constraint.
+        # Locking the device row makes concurrent downloads from the same device
+        # run one at a time, so the count delta only covers this download's rows.
+        with transaction.atomic():
+            Device.objects.select_for_update().only('pk').get(pk=device.pk)
+            existing_count = AttendanceEvent.objects.filter(device=device).count()
+            AttendanceEvent.objects.bulk_create([
+                AttendanceEvent(
                     device=device,
                     user_id=record.user_id,
                     timestamp=record.timestamp,
-                    defaults={
-                        'employee': employee,
-                        'punch_type': record.punch,
-                        'verify_mode': getattr(record, 'status', 0),
-                        'work_code': 0,
-                    }
+                    employee=emp_by_user.get(record.user_id),
+                    punch_type=record.punch,
+                    verify_mode=getattr(record, 'status', 0),
+                    work_code=0,
                 )
+                for record in attendance_records
+            ], batch_size=1000, ignore_conflicts=True)
+            success_count = AttendanceEvent.objects.filter(device=device).count() - existing_count
+            linked_count = AttendanceEvent.link_unmatched_employees(device)
+        duplicate_count = len(attendance_records) - success_count
 
-                if created:
-                    success_count += 1
-                else:
-                    duplicate_count += 1
-
-            except Exception as e:
-                error_count += 1
+        if success_count > 0 or linked_count > 0:
+            invalidate_summary_cache()
 
         device.last_sync = timezone.now()
-        device.save()
+        device.save(update_fields=['last_sync', 'updated_at'])
 
         if success_count > 0:
             messages.success(request, f'Downloaded {success_count} new attendance events')
         if duplicate_count > 0:
             messages.info(request, f'{duplicate_count} duplicate events skipped')
-        if error_count > 0:
-            messages.warning(request, f'{error_count} events failed to import')
 
     except Exception as e:
         messages.error(request, f'Error connecting to device: {str(e)}')
@@ -145,9 +248,17 @@ def download_attendance(request):
     return redirect('attendance:attendance_list')
 
 
-@attendance_section_required
-def attendance_report(request):
-    """Generate attendance reports with date range support"""
+# Report types covering several days, summarized per date and employee
+RANGE_REPORT_TYPES = ('date_range', 'weekly', 'monthly')
+
+
+def _report_params(request):
+    """
+    Parse the report type, period and filters shared by the report page and its export
+
+    Range reports also get the 'start_date'/'end_date' they cover. An invalid date
+    falls back to today's daily report.
+    """
     report_type = request.GET.get('type', 'date_range')
     employee_id = request.GET.get('employee')
     device_id = request.GET.get('device')
@@ -157,23 +268,27 @@ def attendance_report(request):
     date_to_str = request.GET.get('date_to')
     date_str = request.GET.get('date', datetime.now().strftime('%Y-%m-%d'))
 
-    employee = None
-    device = None
-    summary = {}
-    date = None
-    date_from = None
-    date_to = None
+    params = {
+        'report_type': report_type,
+        'employee': None,
+        'device': None,
+        'date': None,
+        'date_from': None,
+        'date_to': None,
+        'start_date': None,
+        'end_date': None,
+    }
 
     # Get employee and device objects
     if employee_id:
         try:
-            employee = Employee.objects.get(pk=employee_id)
+            params['employee'] = Employee.objects.get(pk=employee_id)
         except Employee.DoesNotExist:
             pass
 
     if device_id:
         try:
-            device = Device.objects.get(pk=device_id)
+            params['device'] = Device.objects.get(pk=device_id)
         except Device.DoesNotExist:
             pass
 
@@ -189,102 +304,80 @@ def attendance_report(request):
                 date_to = datetime.now().date()
                 date_from = date_to - timedelta(days=7)
 
-            summary = get_date_range_summary(date_from, date_to, employee, device)
+            params.update(date_from=date_from, date_to=date_to, start_date=date_from, end_date=date_to)
 
         elif report_type == 'daily':
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            summary = get_daily_summary(date, employee, device)
+            params['date'] = datetime.strptime(date_str, '%Y-%m-%d').date()
 
         elif report_type == 'weekly':
             date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            summary = get_weekly_summary(date, employee, device)
+            params['date'] = date
+            params['start_date'], params['end_date'] = week_bounds(date)
 
         elif report_type == 'monthly':
             date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            summary = get_monthly_summary(date.year, date.month, employee, device)
+            params['date'] = date
+            params['start_date'], params['end_date'] = month_bounds(date.year, date.month)
 
     except ValueError:
         # Default to today
-        date = datetime.now().date()
-        summary = get_daily_summary(date, employee, device)
-        report_type = 'daily'
+        params['date'] = datetime.now().date()
+        params['report_type'] = 'daily'
+
+    return params
+
+
+@attendance_section_required
+def attendance_report(request):
+    """Generate attendance reports with date range support"""
+    params = _report_params(request)
+    report_type = params['report_type']
+    employee = params['employee']
+    device = params['device']
+
+    summary = {}
+    if report_type in RANGE_REPORT_TYPES:
+        summary = get_date_range_summary(params['start_date'], params['end_date'], employee, device)
+    elif report_type == 'daily':
+        summary = get_daily_summary(params['date'], employee, device)
 
     context = {
         'report_type': report_type,
-        'date': date,
-        'date_from': date_from,
-        'date_to': date_to,
+        'date': params['date'],
+        'date_from': params['date_from'],
+        'date_to': params['date_to'],
         'summary': summary,
         'employee': employee,
         'device': device,
-        'employees': Employee.objects.filter(is_active=True),
-        'devices': Device.objects.filter(is_active=True),
     }
+    context['employees'] = active_employees()
+    context['devices'] = active_devices()
     return render(request, 'attendance/attendance_report.html', context)
 
 
 @attendance_section_required
+@gzip_page
 def export_attendance_report(request):
     """Export attendance report with paired events to CSV"""
-    report_type = request.GET.get('type', 'date_range')
-    employee_id = request.GET.get('employee')
-    device_id = request.GET.get('device')
-
-    # Date range parameters
-    date_from_str = request.GET.get('date_from')
-    date_to_str = request.GET.get('date_to')
-    date_str = request.GET.get('date', datetime.now().strftime('%Y-%m-%d'))
-
-    employee = None
-    device = None
-    summary = {}
-    date = None
-    date_from = None
-    date_to = None
-
-    # Get employee and device objects
-    if employee_id:
-        try:
-            employee = Employee.objects.get(pk=employee_id)
-        except Employee.DoesNotExist:
-            pass
-
-    if device_id:
-        try:
-            device = Device.objects.get(pk=device_id)
-        except Device.DoesNotExist:
-            pass
-
-    # Parse dates based on report type
-    try:
-        if report_type == 'date_range':
-            if date_from_str and date_to_str:
-                date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
-                date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
-            else:
-                date_to = datetime.now().date()
-                date_from = date_to - timedelta(days=7)
-            summary = get_date_range_summary(date_from, date_to, employee, device)
-
-        elif report_type == 'daily':
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            summary = get_daily_summary(date, employee, device)
-
-        elif report_type == 'weekly':
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            summary = get_weekly_summary(date, employee, device)
-
-        elif report_type == 'monthly':
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            summary = get_monthly_summary(date.year, date.month, employee, device)
-
-    except ValueError:
-        date = datetime.now().date()
-        summary = get_daily_summary(date, employee, device)
-        report_type = 'daily'
-
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
+    params = _report_params(request)
+    report_type = params['report_type']
+    employee = params['employee']
+    device = params['device']
+    date = params['date']
+    date_from = params['date_from']
+    date_to = params['date_to']
+
+    # Range reports are streamed one employee/day at a time instead of building
+    # the full date -> employee summary in memory
+    if report_type in RANGE_REPORT_TYPES:
+        day_summaries = (
+            (report_date, data)
+            for report_date, emp_id, data in iter_date_range_summary(
+                params['start_date'], params['end_date'], employee, device
+            )
+        )
+    else:
+        day_summaries = ((date, data) for data in get_daily_summary(date, employee, device).values())
 
     # Generate filename based on report type
     if report_type == 'date_range':
@@ -300,75 +393,57 @@ def export_attendance_report(request):
         filename += f'_{employee.employee_id}'
 
     filename += '.csv'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-    writer = csv.writer(response)
+    # Resolve verify mode labels with plain dict lookups instead of per-row method calls
+    verify_labels = AttendanceEvent.VERIFY_MODES
+    verify_unknown = AttendanceEvent.VERIFY_MODE_UNKNOWN
+
+    def rows():
+        writer = csv.writer(Echo())
+        yield writer.writerow([
+            'Date',
+            'Employee ID',
+            'Employee Name',
+            'Clock In',
+            'Clock Out',
+            'Duration (minutes)',
+            'Duration (formatted)',
+            'In - Verify Mode',
+            'Out - Verify Mode',
+            'Device'
+        ])
 
-    # Write header
-    writer.writerow([
-        'Date',
-        'Employee ID',
-        'Employee Name',
-        'Clock In',
-        'Clock Out',
-        'Duration (minutes)',
-        'Duration (formatted)',
-        'In - Verify Mode',
-        'Out - Verify Mode',
-        'Device'
-    ])
-
-    # Write data based on report type
-    if report_type in ['date_range', 'weekly', 'monthly']:
-        # Date range reports - grouped by date
-        for report_date, employees in sorted(summary.items()):
-            for emp_id, data in employees.items():
-                for event_in, event_out, duration_min in data['pairs']:
-                    hours = int(duration_min // 60)
-                    minutes = int(duration_min % 60)
-                    duration_formatted = f"{hours}h {minutes}m"
-
-                    writer.writerow([
-                        report_date.strftime('%Y-%m-%d'),
-                        event_in.employee.employee_id if event_in.employee else '',
-                        data['name'],
-                        event_in.timestamp.strftime('%H:%M:%S'),
-                        event_out.timestamp.strftime('%H:%M:%S'),
-                        f"{duration_min:.0f}",
-                        duration_formatted,
-                        event_in.get_verify_mode_display_custom(),
-                        event_out.get_verify_mode_display_custom(),
-                        event_in.device.name
-                    ])
-    else:
-        # Daily report - single date
-        for emp_id, data in summary.items():
+        for report_date, data in day_summaries:
             for event_in, event_out, duration_min in data['pairs']:
                 hours = int(duration_min // 60)
                 minutes = int(duration_min % 60)
                 duration_formatted = f"{hours}h {minutes}m"
 
-                writer.writerow([
-                    date.strftime('%Y-%m-%d'),
+                yield writer.writerow([
+                    report_date.isoformat(),
                     event_in.employee.employee_id if event_in.employee else '',
                     data['name'],
-                    event_in.timestamp.strftime('%H:%M:%S'),
-                    event_out.timestamp.strftime('%H:%M:%S'),
+                    event_in.timestamp.time().isoformat('seconds'),
+                    event_out.timestamp.time().isoformat('seconds'),
                     f"{duration_min:.0f}",
                     duration_formatted,
-                    event_in.get_verify_mode_display_custom(),
-                    event_out.get_verify_mode_display_custom(),
+                    verify_labels.get(event_in.verify_mode, verify_unknown),
+                    verify_labels.get(event_out.verify_mode, verify_unknown),
                     event_in.device.name
                 ])
 
+    # Stream the CSV so the first rows go out while later days are still being paired
+    response = StreamingHttpResponse(_chunked_lines(rows()), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
 @attendance_section_required
+@gzip_page
 def export_attendance(request):
     """Export attendance events to CSV"""
-    # Get filtered queryset
-    queryset = AttendanceEvent.objects.all().select_related('employee', 'device')
+    # Get filtered queryset; rows are read as tuples, so no related objects are loaded
+    queryset = AttendanceEvent.objects.all()
 
     employee_id = request.GET.get('employee')
     if employee_id:
@@ -378,19 +453,10 @@ def export_attendance(request):
     if device_id:
         queryset = queryset.filter(device_id=device_id)
 
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    if date_from:
-        queryset = queryset.filter(timestamp__gte=date_from)
-    if date_to:
-        queryset = queryset.filter(timestamp__lte=date_to)
-
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="attendance_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    queryset = _filter_date_range(queryset, request.GET.get('date_from'), request.GET.get('date_to'))
 
-    writer = csv.writer(response)
-    writer.writerow([
+    filename = f'attendance_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    header = [
         'Date',
         'Time',
         'Employee ID',
@@ -399,18 +465,40 @@ def export_attendance(request):
         'Punch Type',
         'Verify Mode',
         'Device'
-    ])
-
-    for event in queryset:
-        writer.writerow([
-            event.timestamp.strftime('%Y-%m-%d'),
-            event.timestamp.strftime('%H:%M:%S'),
-            event.employee.employee_id if event.employee else '',
-            event.employee.full_name if event.employee else f'User {event.user_id}',
-            event.user_id,
-            event.get_punch_type_display(),
-            event.get_verify_mode_display_custom(),
-            event.device.name
-        ])
-
+    ]
+
+    if connection.vendor == 'postgresql':
+        return _copy_export_response(queryset, header, filename)
+
+    # Resolve display labels with plain dict lookups instead of per-row method calls
+    punch_labels = AttendanceEvent.PUNCH_TYPE_MAP
+    verify_labels = AttendanceEvent.VERIFY_MODES
+    verify_unknown = AttendanceEvent.VERIFY_MODE_UNKNOWN
+
+    def rows():
+        writer = csv.writer(Echo())
+        yield writer.writerow(header)
+
+        values = queryset.values_list(
+            'timestamp', 'employee', 'employee__employee_id', 'employee__first_name',
+            'employee__last_name', 'user_id', 'punch_type', 'verify_mode', 'device__name',
+        )
+        for (timestamp, employee, employee_code, first_name, last_name,
+                user_id, punch_type, verify_mode, device_name) in values.iterator(chunk_size=2000):
+            # One isoformat call yields both the date and time columns
+            iso = timestamp.isoformat(sep=' ', timespec='seconds')
+            yield writer.writerow([
+                iso[:10],
+                iso[11:19],
+                employee_code or '',
+                f'{first_name} {last_name}' if employee else f'User {user_id}',
+                user_id,
+                punch_labels.get(punch_type, punch_type),
+                verify_labels.get(verify_mode, verify_unknown),
+                device_name
+            ])
+
+    # Stream the CSV so large exports are never held in memory
+    response = StreamingHttpResponse(_chunked_lines(rows()), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
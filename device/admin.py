@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from .models import Device, DeviceLog
 
@@ -12,6 +13,9 @@ class DeviceLogInline(admin.TabularInline):
     readonly_fields = ['timestamp', 'action', 'status_badge', 'message', 'duration', 'user']
     ordering = ['-timestamp']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
     def status_badge(self, obj):
         colors = {
             'success': 'green',
@@ -57,9 +61,14 @@ class DeviceAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Count logs for every device in the changelist query instead of once per row
+        return super().get_queryset(request).annotate(_log_count=Count('logs'))
+
     def log_count(self, obj):
-        return obj.logs.count()
+        return obj._log_count
     log_count.short_description = 'Logs'
+    log_count.admin_order_field = '_log_count'
 
 
 @admin.register(DeviceLog)
@@ -83,6 +92,9 @@ class DeviceLogAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_related()
+
     def status_badge(self, obj):
         colors = {
             'success': 'green',
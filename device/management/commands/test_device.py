@@ -36,16 +36,15 @@ class Command(BaseCommand):
             if connector.use_mock:
                 self.stdout.write(self.style.WARNING('Using MOCK mode'))
 
-        success, message = connector.test_connection()
+        # Reuse the test connection for device info instead of connecting twice
+        conn, message = connector.connect_for_test()
 
-        if success:
+        if conn is not None:
             self.stdout.write(self.style.SUCCESS(f'✓ {message}'))
 
             # Try to get device info
             try:
-                conn = connector.connect()
                 info = connector.get_device_info(conn)
-                conn.disconnect()
 
                 self.stdout.write('\nDevice Information:')
                 self.stdout.write(f'  Serial Number: {info["serial_number"]}')
@@ -53,6 +52,8 @@ class Command(BaseCommand):
                 self.stdout.write(f'  Platform: {info["platform"]}')
             except Exception as e:
                 self.stdout.write(self.style.WARNING(f'Could not retrieve device info: {e}'))
+            finally:
+                conn.disconnect()
         else:
             self.stdout.write(self.style.ERROR(f'✗ {message}'))
             raise CommandError('Connection test failed')
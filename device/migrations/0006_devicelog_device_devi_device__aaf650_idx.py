@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 04:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device', '0005_alter_device_created_at_alter_device_device_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='devicelog',
+            index=models.Index(fields=['device', 'action', '-timestamp'], name='device_devi_device__aaf650_idx'),
+        ),
+    ]
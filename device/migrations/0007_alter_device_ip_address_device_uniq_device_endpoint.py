@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-15 05:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_endpoints(apps, schema_editor):
+    """Stop with a readable list of devices sharing an IP address and port.
+
+    The same check in SQL:
+        SELECT ip_address, port, COUNT(*) FROM device_device
+        GROUP BY ip_address, port HAVING COUNT(*) > 1;
+    """
+    Device = apps.get_model('device', 'Device')
+    duplicates = (
+        Device.objects.using(schema_editor.connection.alias)
+        .values('ip_address', 'port')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by('ip_address', 'port')
+    )
+    problems = []
+    for dup in duplicates:
+        devices = Device.objects.using(schema_editor.connection.alias).filter(
+            ip_address=dup['ip_address'], port=dup['port']
+        ).order_by('pk')
+        names = ', '.join(f'#{device.pk} {device.name}' for device in devices)
+        problems.append(f"  {dup['ip_address']}:{dup['port']} -> {names}")
+    if problems:
+        raise RuntimeError(
+            'Cannot add uniq_device_endpoint: several devices share an IP address and port.\n'
+            + '\n'.join(problems)
+            + '\nChange the port or delete the extra devices, then run migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device', '0006_devicelog_device_devi_device__aaf650_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='device',
+            name='ip_address',
+            field=models.GenericIPAddressField(db_index=True, verbose_name='IP Address'),
+        ),
+        migrations.RunPython(check_duplicate_endpoints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='device',
+            constraint=models.UniqueConstraint(fields=('ip_address', 'port'), name='uniq_device_endpoint', violation_error_message='A device with this IP address and port already exists.'),
+        ),
+    ]
@@ -1,102 +1,134 @@
 """
 Mock implementation of ZKTeco device for development without physical hardware
 """
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+import logging
 import random
 
+logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True, slots=True)
 class MockUser:
     """Mock user object matching pyzk User structure"""
-    def __init__(self, uid, name, privilege, password, group_id, user_id):
-        self.uid = uid
-        self.name = name
-        self.privilege = privilege
-        self.password = password
-        self.group_id = group_id
-        self.user_id = user_id
+    uid: int
+    name: str
+    privilege: int
+    password: str
+    group_id: str
+    user_id: str
 
 
+@dataclass(frozen=True, slots=True)
 class MockAttendance:
     """Mock attendance object matching pyzk Attendance structure"""
-    def __init__(self, user_id, timestamp, punch):
-        self.user_id = user_id
-        self.timestamp = timestamp
-        self.punch = punch
-        self.status = 0
+    user_id: int
+    timestamp: datetime
+    punch: int
+    status: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class MockFinger:
+    """Mock fingerprint object matching pyzk Finger structure"""
+    uid: int
+    fid: int
+    valid: int
+    template: bytes
+
+
+# Fake users present on every mock device
+_DEFAULT_USERS = (
+    MockUser(1, "John Doe", 0, "", "0", "EMP001"),
+    MockUser(2, "Jane Smith", 0, "", "0", "EMP002"),
+    MockUser(3, "Bob Johnson", 0, "", "0", "EMP003"),
+    MockUser(4, "Alice Williams", 14, "", "0", "EMP004"),
+    MockUser(5, "Charlie Brown", 0, "", "0", "EMP005"),
+)
+
+# Fingerprint templates present on every mock device: {(uid, temp_id): template_data}
+_DEFAULT_TEMPLATES = {
+    (1, 0): b'MOCK_TEMPLATE_USER1_FINGER0',
+    (1, 1): b'MOCK_TEMPLATE_USER1_FINGER1',
+    (2, 5): b'MOCK_TEMPLATE_USER2_FINGER5',
+    (3, 0): b'MOCK_TEMPLATE_USER3_FINGER0',
+    (3, 6): b'MOCK_TEMPLATE_USER3_FINGER6',
+}
+
+
+@lru_cache(maxsize=1)
+def _build_default_attendance():
+    """
+    Generate fake attendance for the 7 days before the first call
+
+    Built once per process, so every connection sees the same device log,
+    like a real device that has not been cleared.
+    """
+    attendance = []
+    base_time = datetime.now() - timedelta(days=7)
+    for day in range(7):
+        for user_id in [1, 2, 3, 4, 5]:
+            # Skip some days randomly to make it realistic
+            if random.random() > 0.1:  # 90% attendance rate
+                # Check in
+                check_in = base_time + timedelta(
+                    days=day,
+                    hours=9,
+                    minutes=random.randint(0, 30)
+                )
+                attendance.append(MockAttendance(user_id, check_in, 0))
+
+                # Check out
+                check_out = base_time + timedelta(
+                    days=day,
+                    hours=17,
+                    minutes=random.randint(0, 30)
+                )
+                attendance.append(MockAttendance(user_id, check_out, 1))
+    return tuple(attendance)
 
 
 class MockConnection:
     """Mock connection object that simulates device responses"""
 
     def __init__(self):
-        # Generate fake users
-        self.users = [
-            MockUser(1, "John Doe", 0, "", "0", "EMP001"),
-            MockUser(2, "Jane Smith", 0, "", "0", "EMP002"),
-            MockUser(3, "Bob Johnson", 0, "", "0", "EMP003"),
-            MockUser(4, "Alice Williams", 14, "", "0", "EMP004"),
-            MockUser(5, "Charlie Brown", 0, "", "0", "EMP005"),
-        ]
-
-        # Generate fake attendance for last 7 days
-        self.attendance = []
-        base_time = datetime.now() - timedelta(days=7)
-        for day in range(7):
-            for user_id in [1, 2, 3, 4, 5]:
-                # Skip some days randomly to make it realistic
-                if random.random() > 0.1:  # 90% attendance rate
-                    # Check in
-                    check_in = base_time + timedelta(
-                        days=day,
-                        hours=9,
-                        minutes=random.randint(0, 30)
-                    )
-                    self.attendance.append(MockAttendance(user_id, check_in, 0))
-
-                    # Check out
-                    check_out = base_time + timedelta(
-                        days=day,
-                        hours=17,
-                        minutes=random.randint(0, 30)
-                    )
-                    self.attendance.append(MockAttendance(user_id, check_out, 1))
-
-        # Store fingerprint templates: {uid: {temp_id: template_data}}
-        self.fingerprint_templates = {
-            1: {0: b'MOCK_TEMPLATE_USER1_FINGER0', 1: b'MOCK_TEMPLATE_USER1_FINGER1'},
-            2: {5: b'MOCK_TEMPLATE_USER2_FINGER5'},
-            3: {0: b'MOCK_TEMPLATE_USER3_FINGER0', 6: b'MOCK_TEMPLATE_USER3_FINGER6'},
-        }
+        # The fixture objects are immutable; only the containers need copying
+        self.users = {user.uid: user for user in _DEFAULT_USERS}
+        self.attendance = list(_build_default_attendance())
+        self.fingerprint_templates = dict(_DEFAULT_TEMPLATES)
 
     def get_users(self):
         """Return mock users"""
-        print("[MOCK] Getting users from device")
-        return self.users
+        logger.debug("[MOCK] Getting users from device")
+        return list(self.users.values())
 
     def set_user(self, uid, name, privilege, password, group_id, user_id):
         """Simulate setting user on device"""
-        print(f"[MOCK] Would set user: {name} (uid={uid})")
+        logger.debug("[MOCK] Setting user: %s (uid=%s)", name, uid)
+        self.users[uid] = MockUser(uid, name, privilege, password, group_id, user_id)
         return True
 
     def delete_user(self, uid):
         """Simulate deleting user from device"""
-        print(f"[MOCK] Deleting user with uid={uid}")
-        # Actually remove user from the mock user list
-        self.users = [user for user in self.users if user.uid != uid]
+        logger.debug("[MOCK] Deleting user with uid=%s", uid)
+        # Actually remove user from the mock users
+        self.users.pop(uid, None)
         # Also remove their fingerprints
-        if uid in self.fingerprint_templates:
-            del self.fingerprint_templates[uid]
-        print(f"[MOCK] User {uid} deleted successfully")
+        for key in [key for key in self.fingerprint_templates if key[0] == uid]:
+            del self.fingerprint_templates[key]
+        logger.debug("[MOCK] User %s deleted successfully", uid)
         return True
 
     def get_attendance(self):
         """Return mock attendance records"""
-        print("[MOCK] Getting attendance records from device")
+        logger.debug("[MOCK] Getting attendance records from device")
         return self.attendance
 
     def clear_attendance(self):
         """Simulate clearing attendance from device"""
-        print("[MOCK] Would clear attendance records")
+        logger.debug("[MOCK] Would clear attendance records")
         return True
 
     def get_serialnumber(self):
@@ -113,18 +145,17 @@ class MockConnection:
 
     def disable_device(self):
         """Simulate disabling device"""
-        print("[MOCK] Device disabled")
+        logger.debug("[MOCK] Device disabled")
         return True
 
     def enable_device(self):
         """Simulate enabling device"""
-        print("[MOCK] Device enabled")
+        logger.debug("[MOCK] Device enabled")
         return True
 
     def disconnect(self):
         """Simulate disconnection"""
-        print("[MOCK] Disconnected from device")
-        pass
+        logger.debug("[MOCK] Disconnected from device")
 
     # Fingerprint management methods
 
@@ -139,15 +170,13 @@ class MockConnection:
         Returns:
             bool: Success status
         """
-        print(f"[MOCK] Starting fingerprint enrollment for user {uid}, finger {temp_id}")
-        print(f"[MOCK] Device is now in enrollment mode. User should scan finger at device.")
+        logger.debug("[MOCK] Starting fingerprint enrollment for user %s, finger %s", uid, temp_id)
+        logger.debug("[MOCK] Device is now in enrollment mode. User should scan finger at device.")
 
         # Simulate successful enrollment by generating a template
-        if uid not in self.fingerprint_templates:
-            self.fingerprint_templates[uid] = {}
-        self.fingerprint_templates[uid][temp_id] = f'MOCK_TEMPLATE_USER{uid}_FINGER{temp_id}'.encode()
+        self.fingerprint_templates[(uid, temp_id)] = f'MOCK_TEMPLATE_USER{uid}_FINGER{temp_id}'.encode()
 
-        print(f"[MOCK] Enrollment completed successfully")
+        logger.debug("[MOCK] Enrollment completed successfully")
         return True
 
     def get_user_template(self, uid, temp_id):
@@ -161,13 +190,26 @@ class MockConnection:
         Returns:
             bytes: Template data or None if not found
         """
-        template = self.fingerprint_templates.get(uid, {}).get(temp_id)
+        template = self.fingerprint_templates.get((uid, temp_id))
         if template:
-            print(f"[MOCK] Downloaded fingerprint template for user {uid}, finger {temp_id}")
+            logger.debug("[MOCK] Downloaded fingerprint template for user %s, finger %s", uid, temp_id)
         else:
-            print(f"[MOCK] No fingerprint template found for user {uid}, finger {temp_id}")
+            logger.debug("[MOCK] No fingerprint template found for user %s, finger %s", uid, temp_id)
         return template
 
+    def get_templates(self):
+        """
+        Download all fingerprint templates from device
+
+        Returns:
+            list: MockFinger objects
+        """
+        logger.debug("[MOCK] Getting all fingerprint templates from device")
+        return [
+            MockFinger(uid, temp_id, 1, template)
+            for (uid, temp_id), template in self.fingerprint_templates.items()
+        ]
+
     def set_user_template(self, uid, temp_id, valid, template):
         """
         Upload fingerprint template to device
@@ -181,10 +223,8 @@ class MockConnection:
         Returns:
             bool: Success status
         """
-        print(f"[MOCK] Uploading fingerprint template for user {uid}, finger {temp_id}")
-        if uid not in self.fingerprint_templates:
-            self.fingerprint_templates[uid] = {}
-        self.fingerprint_templates[uid][temp_id] = template
+        logger.debug("[MOCK] Uploading fingerprint template for user %s, finger %s", uid, temp_id)
+        self.fingerprint_templates[(uid, temp_id)] = template
         return True
 
     def delete_user_template(self, uid, temp_id):
@@ -198,11 +238,11 @@ class MockConnection:
         Returns:
             bool: Success status
         """
-        if uid in self.fingerprint_templates and temp_id in self.fingerprint_templates[uid]:
-            del self.fingerprint_templates[uid][temp_id]
-            print(f"[MOCK] Deleted fingerprint template for user {uid}, finger {temp_id}")
-        else:
-            print(f"[MOCK] No fingerprint template to delete for user {uid}, finger {temp_id}")
+        try:
+            del self.fingerprint_templates[(uid, temp_id)]
+            logger.debug("[MOCK] Deleted fingerprint template for user %s, finger %s", uid, temp_id)
+        except KeyError:
+            logger.debug("[MOCK] No fingerprint template to delete for user %s, finger %s", uid, temp_id)
         return True
 
 
@@ -213,9 +253,9 @@ class MockZK:
         self.ip = ip
         self.port = port
         self.timeout = timeout
-        print(f"[MOCK] Initialized MockZK for {ip}:{port}")
+        logger.debug("[MOCK] Initialized MockZK for %s:%s", ip, port)
 
     def connect(self):
         """Simulate connection to device"""
-        print(f"[MOCK] Connecting to {self.ip}:{self.port}")
+        logger.debug("[MOCK] Connecting to %s:%s", self.ip, self.port)
         return MockConnection()
@@ -6,7 +6,7 @@ from django.utils.translation import gettext_lazy as _
 class Device(models.Model):
     """Stores ZKTeco K40 device connection information"""
     name = models.CharField(max_length=100, verbose_name=_("Name"))
-    ip_address = models.GenericIPAddressField(verbose_name=_("IP Address"))
+    ip_address = models.GenericIPAddressField(db_index=True, verbose_name=_("IP Address"))
     port = models.IntegerField(default=4370, verbose_name=_("Port"))
     device_id = models.IntegerField(default=1, verbose_name=_("Device ID"))
     password = models.CharField(max_length=50, blank=True, verbose_name=_("Password"), help_text=_("Device communication password (optional)"))
@@ -27,11 +27,24 @@ class Device(models.Model):
             ('view_device_section', 'Can access device management section'),
             ('manage_devices', 'Can manage device configurations'),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ip_address', 'port'],
+                name='uniq_device_endpoint',
+                violation_error_message=_('A device with this IP address and port already exists.'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.ip_address})"
 
 
+class DeviceLogQuerySet(models.QuerySet):
+    def with_related(self):
+        """Join the device and user so listing logs doesn't query them per row"""
+        return self.select_related('device', 'user')
+
+
 class DeviceLog(models.Model):
     """Logs all device connection attempts and operations"""
 
@@ -61,6 +74,8 @@ class DeviceLog(models.Model):
     duration = models.FloatField(null=True, blank=True, verbose_name=_("Duration (seconds)"))
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name=_("Timestamp"))
 
+    objects = DeviceLogQuerySet.as_manager()
+
     class Meta:
         ordering = ['-timestamp']
         verbose_name = _('Device Log')
@@ -70,6 +85,7 @@ class DeviceLog(models.Model):
             models.Index(fields=['device', '-timestamp']),
             models.Index(fields=['status', '-timestamp']),
             models.Index(fields=['action', '-timestamp']),
+            models.Index(fields=['device', 'action', '-timestamp']),
         ]
 
     def __str__(self):
@@ -17,6 +17,12 @@ class DeviceListView(DeviceSectionMixin, ListView):
     context_object_name = 'devices'
     paginate_by = 10
 
+    def get_queryset(self):
+        # Only load the columns shown in the list
+        return super().get_queryset().only(
+            'name', 'ip_address', 'port', 'is_active', 'serial_number', 'last_sync'
+        )
+
 
 class DeviceCreateView(DeviceSectionMixin, CreateView):
     """Create new device"""
@@ -61,6 +67,13 @@ def test_connection(request, pk):
     """Test device connection via AJAX"""
     device = get_object_or_404(Device, pk=pk)
 
+    # Don't wait out a connect timeout on a device that has been switched off
+    if not device.is_active:
+        return JsonResponse({
+            'success': False,
+            'message': 'Device is inactive'
+        })
+
     try:
         connector = ZKDeviceConnector(device)
         success, message = connector.test_connection()
@@ -78,8 +91,12 @@ def test_connection(request, pk):
 
 @device_section_required
 def device_info(request, pk):
-    """Show detailed device information"""
+    """Show detailed device information (as JSON with ?format=json)"""
     device = get_object_or_404(Device, pk=pk)
+    wants_json = (
+        request.GET.get('format') == 'json'
+        or request.headers.get('Accept') == 'application/json'
+    )
     info = None
     error = None
 
@@ -88,17 +105,41 @@ def device_info(request, pk):
         conn = connector.connect()
         info = connector.get_device_info(conn)
 
-        # Update device with fetched info
+        # Update device with fetched info. A queryset update skips the
+        # post_save signal, which would needlessly drop the cached
+        # device filter choices (none of these fields are in them).
+        now = timezone.now()
+        Device.objects.filter(pk=device.pk).update(
+            serial_number=info['serial_number'],
+            firmware_version=info['firmware_version'],
+            last_sync=now,
+            updated_at=now,
+        )
         device.serial_number = info['serial_number']
         device.firmware_version = info['firmware_version']
-        device.last_sync = timezone.now()
-        device.save()
+        device.last_sync = now
 
         conn.disconnect()
-        messages.success(request, 'Device information retrieved successfully!')
+        if not wants_json:
+            messages.success(request, 'Device information retrieved successfully!')
     except Exception as e:
         error = str(e)
-        messages.error(request, f'Error retrieving device info: {error}')
+        if not wants_json:
+            messages.error(request, f'Error retrieving device info: {error}')
+
+    if wants_json:
+        return JsonResponse({
+            'device': {
+                'id': device.pk,
+                'name': device.name,
+                'ip_address': device.ip_address,
+                'port': device.port,
+                'is_active': device.is_active,
+                'last_sync': device.last_sync,
+            },
+            'info': info,
+            'error': error,
+        })
 
     context = {
         'device': device,
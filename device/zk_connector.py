@@ -5,13 +5,16 @@ import logging
 import time
 from django.conf import settings
 from .mocks import MockZK
+from .models import DeviceLog
 
 logger = logging.getLogger('device.auth')
 
-# Import Finger class for real device operations
+# Import pyzk classes for real device operations
 try:
+    from zk import ZK
     from zk.finger import Finger
 except ImportError:
+    ZK = None
     Finger = None
 
 
@@ -44,44 +47,41 @@ class ZKDeviceConnector:
         if use_mock:
             self.zk = MockZK(device.ip_address, device.port)
         else:
-            try:
-                from zk import ZK
-
-                # Parse password - convert to int if numeric, otherwise use 0
-                password = 0
-                if device.password:
-                    try:
-                        password = int(device.password)
-                    except ValueError:
-                        logger.warning(f"Invalid password format for device {device.name}, using 0")
-
-                self.zk = ZK(
-                    ip=device.ip_address,
-                    port=device.port,
-                    timeout=5,
-                    password=password,
-                    force_udp=device.force_udp,
-                    ommit_ping=device.ommit_ping
-                )
-
-                # Log connection parameters
-                conn_info = []
-                if password != 0:
-                    conn_info.append("password authentication")
-                if device.force_udp:
-                    conn_info.append("UDP protocol")
-                if device.ommit_ping:
-                    conn_info.append("ping omitted")
-
-                if conn_info:
-                    logger.info(f"Connection options for {device.name}: {', '.join(conn_info)}")
-
-            except ImportError:
+            if ZK is None:
                 logger.error("pyzk library not found")
                 raise ImportError(
                     "pyzk library not found. Install it with: pip install pyzk"
                 )
 
+            # Parse password - convert to int if numeric, otherwise use 0
+            password = 0
+            if device.password:
+                try:
+                    password = int(device.password)
+                except ValueError:
+                    logger.warning(f"Invalid password format for device {device.name}, using 0")
+
+            self.zk = ZK(
+                ip=device.ip_address,
+                port=device.port,
+                timeout=5,
+                password=password,
+                force_udp=device.force_udp,
+                ommit_ping=device.ommit_ping
+            )
+
+            # Log connection parameters
+            conn_info = []
+            if password != 0:
+                conn_info.append("password authentication")
+            if device.force_udp:
+                conn_info.append("UDP protocol")
+            if device.ommit_ping:
+                conn_info.append("ping omitted")
+
+            if conn_info:
+                logger.info(f"Connection options for {device.name}: {', '.join(conn_info)}")
+
     def _log_to_database(self, action, status, message, details=None, duration=None):
         """
         Log operation to database
@@ -94,7 +94,6 @@ class ZKDeviceConnector:
             duration: Operation duration in seconds
         """
         try:
-            from .models import DeviceLog
             DeviceLog.objects.create(
                 device=self.device,
                 action=action,
@@ -115,19 +114,35 @@ class ZKDeviceConnector:
         Returns:
             tuple: (success: bool, message: str)
         """
+        conn, message = self.connect_for_test()
+        if conn is None:
+            return False, message
+
+        conn.disconnect()
+        return True, message
+
+    def connect_for_test(self):
+        """
+        Connect to device and log the attempt as a connection test
+
+        Lets callers keep using the connection (e.g. to read device info)
+        instead of reconnecting after test_connection.
+
+        Returns:
+            tuple: (conn or None on failure, message: str)
+        """
         start_time = time.time()
         logger.info(f"Testing connection to device {self.device.name}")
 
         try:
             conn = self.connect()
-            conn.disconnect()
             duration = time.time() - start_time
 
             message = "Connection successful"
             logger.info(f"✓ {message} (took {duration:.2f}s)")
             self._log_to_database('test', 'success', message, duration=duration)
 
-            return True, message
+            return conn, message
         except Exception as e:
             duration = time.time() - start_time
             message = str(e)
@@ -135,7 +150,7 @@ class ZKDeviceConnector:
             logger.error(f"✗ Connection failed: {message}")
             self._log_to_database('test', 'failed', message, duration=duration)
 
-            return False, message
+            return None, message
 
     def connect(self):
         """
@@ -251,17 +266,17 @@ class ZKDeviceConnector:
         Returns:
             bool: Success status
         """
-        logger.info(f"[FINGERPRINT_ENROLL] Starting enrollment for user {uid}, finger {temp_id}")
-        logger.debug(f"[FINGERPRINT_ENROLL] Device: {self.device.name} ({self.device.ip_address}), Mode: {'MOCK' if self.use_mock else 'REAL'}")
+        logger.info("[FINGERPRINT_ENROLL] Starting enrollment for user %s, finger %s", uid, temp_id)
+        logger.debug("[FINGERPRINT_ENROLL] Device: %s (%s), Mode: %s", self.device.name, self.device.ip_address, 'MOCK' if self.use_mock else 'REAL')
 
         try:
             result = conn.enroll_user(uid, temp_id=temp_id)
-            logger.info(f"[FINGERPRINT_ENROLL] ✓ Enrollment initiated successfully for user {uid}, finger {temp_id}")
-            logger.info(f"[FINGERPRINT_ENROLL] User should now scan finger on device")
+            logger.info("[FINGERPRINT_ENROLL] ✓ Enrollment initiated successfully for user %s, finger %s", uid, temp_id)
+            logger.info("[FINGERPRINT_ENROLL] User should now scan finger on device")
             return result
         except Exception as e:
-            logger.error(f"[FINGERPRINT_ENROLL] ✗ Failed to start enrollment for user {uid}, finger {temp_id}: {type(e).__name__}: {str(e)}")
-            logger.exception(f"[FINGERPRINT_ENROLL] Full traceback:")
+            logger.error("[FINGERPRINT_ENROLL] ✗ Failed to start enrollment for user %s, finger %s: %s: %s", uid, temp_id, type(e).__name__, e)
+            logger.exception("[FINGERPRINT_ENROLL] Full traceback:")
             raise
 
     def get_fingerprint_template(self, conn, uid, temp_id):
@@ -276,7 +291,7 @@ class ZKDeviceConnector:
         Returns:
             bytes: Template data or None if not found
         """
-        logger.debug(f"[FINGERPRINT_DOWNLOAD] Requesting template for user {uid}, finger {temp_id}")
+        logger.debug("[FINGERPRINT_DOWNLOAD] Requesting template for user %s, finger %s", uid, temp_id)
 
         try:
             result = conn.get_user_template(uid, temp_id)
@@ -284,23 +299,23 @@ class ZKDeviceConnector:
             if result:
                 # Real device returns Finger object, extract template data
                 if hasattr(result, 'template'):
-                    logger.debug(f"[FINGERPRINT_DOWNLOAD] Received Finger object, extracting template data")
+                    logger.debug("[FINGERPRINT_DOWNLOAD] Received Finger object, extracting template data")
                     template = result.template
-                    logger.info(f"[FINGERPRINT_DOWNLOAD] ✓ Downloaded template for user {uid}, finger {temp_id}: {len(template)} bytes")
-                    logger.debug(f"[FINGERPRINT_DOWNLOAD] Finger object: uid={result.uid}, fid={result.fid}, valid={result.valid}")
+                    logger.info("[FINGERPRINT_DOWNLOAD] ✓ Downloaded template for user %s, finger %s: %s bytes", uid, temp_id, len(template))
+                    logger.debug("[FINGERPRINT_DOWNLOAD] Finger object: uid=%s, fid=%s, valid=%s", result.uid, result.fid, result.valid)
                     return template
                 else:
                     # Mock or direct bytes
-                    logger.debug(f"[FINGERPRINT_DOWNLOAD] Received direct template data")
-                    logger.info(f"[FINGERPRINT_DOWNLOAD] ✓ Downloaded template for user {uid}, finger {temp_id}: {len(result)} bytes")
-                    logger.debug(f"[FINGERPRINT_DOWNLOAD] Template type: {type(result)}")
+                    logger.debug("[FINGERPRINT_DOWNLOAD] Received direct template data")
+                    logger.info("[FINGERPRINT_DOWNLOAD] ✓ Downloaded template for user %s, finger %s: %s bytes", uid, temp_id, len(result))
+                    logger.debug("[FINGERPRINT_DOWNLOAD] Template type: %s", type(result))
                     return result
             else:
-                logger.debug(f"[FINGERPRINT_DOWNLOAD] No template found for user {uid}, finger {temp_id}")
+                logger.debug("[FINGERPRINT_DOWNLOAD] No template found for user %s, finger %s", uid, temp_id)
                 return None
         except Exception as e:
-            logger.error(f"[FINGERPRINT_DOWNLOAD] ✗ Error downloading template for user {uid}, finger {temp_id}: {type(e).__name__}: {str(e)}")
-            logger.exception(f"[FINGERPRINT_DOWNLOAD] Full traceback:")
+            logger.error("[FINGERPRINT_DOWNLOAD] ✗ Error downloading template for user %s, finger %s: %s: %s", uid, temp_id, type(e).__name__, e)
+            logger.exception("[FINGERPRINT_DOWNLOAD] Full traceback:")
             raise
 
     def get_all_fingerprint_templates(self, conn, uid):
@@ -314,7 +329,7 @@ class ZKDeviceConnector:
         Returns:
             dict: {temp_id: template_data} for all enrolled fingers
         """
-        logger.info(f"[FINGERPRINT_DOWNLOAD_ALL] Starting bulk download for user {uid}")
+        logger.info("[FINGERPRINT_DOWNLOAD_ALL] Starting bulk download for user %s", uid)
         templates = {}
 
         try:
@@ -323,14 +338,44 @@ class ZKDeviceConnector:
                 if template:
                     templates[temp_id] = template
 
-            logger.info(f"[FINGERPRINT_DOWNLOAD_ALL] ✓ Downloaded {len(templates)} templates for user {uid}")
+            logger.info("[FINGERPRINT_DOWNLOAD_ALL] ✓ Downloaded %s templates for user %s", len(templates), uid)
             if templates:
-                logger.debug(f"[FINGERPRINT_DOWNLOAD_ALL] Finger slots with templates: {list(templates.keys())}")
+                logger.debug("[FINGERPRINT_DOWNLOAD_ALL] Finger slots with templates: %s", list(templates.keys()))
 
             return templates
         except Exception as e:
-            logger.error(f"[FINGERPRINT_DOWNLOAD_ALL] ✗ Error during bulk download for user {uid}: {type(e).__name__}: {str(e)}")
-            logger.exception(f"[FINGERPRINT_DOWNLOAD_ALL] Full traceback:")
+            logger.error("[FINGERPRINT_DOWNLOAD_ALL] ✗ Error during bulk download for user %s: %s: %s", uid, type(e).__name__, e)
+            logger.exception("[FINGERPRINT_DOWNLOAD_ALL] Full traceback:")
+            raise
+
+    def get_all_templates_bulk(self, conn):
+        """
+        Download every fingerprint template on the device in one read
+
+        Use this when syncing many users; get_all_fingerprint_templates
+        makes up to ten device requests per user.
+
+        Args:
+            conn: Active connection object
+
+        Returns:
+            dict: {uid: {temp_id: template_data}}
+        """
+        logger.info("[FINGERPRINT_DOWNLOAD_BULK] Downloading all templates from %s", self.device.name)
+
+        try:
+            templates = {}
+            for finger in conn.get_templates():
+                templates.setdefault(finger.uid, {})[finger.fid] = finger.template
+
+            logger.info(
+                "[FINGERPRINT_DOWNLOAD_BULK] ✓ Downloaded %s templates for %s users",
+                sum(map(len, templates.values())), len(templates)
+            )
+            return templates
+        except Exception as e:
+            logger.error("[FINGERPRINT_DOWNLOAD_BULK] ✗ Error during bulk download: %s: %s", type(e).__name__, e)
+            logger.exception("[FINGERPRINT_DOWNLOAD_BULK] Full traceback:")
             raise
 
     def set_fingerprint_template(self, conn, uid, temp_id, template):
@@ -346,49 +391,41 @@ class ZKDeviceConnector:
         Returns:
             bool: Success status
         """
-        logger.info(f"[FINGERPRINT_UPLOAD] Starting upload for user {uid}, finger {temp_id}")
-        logger.debug(f"[FINGERPRINT_UPLOAD] Template type: {type(template)}, size: {len(template) if template else 0} bytes")
-        logger.debug(f"[FINGERPRINT_UPLOAD] Mode: {'MOCK' if self.use_mock else 'REAL'}, Finger class available: {Finger is not None}")
+        logger.info("[FINGERPRINT_UPLOAD] Starting upload for user %s, finger %s", uid, temp_id)
+        logger.debug("[FINGERPRINT_UPLOAD] Template type: %s, size: %s bytes", type(template), len(template) if template else 0)
+        logger.debug("[FINGERPRINT_UPLOAD] Mode: %s, Finger class available: %s", 'MOCK' if self.use_mock else 'REAL', Finger is not None)
 
         try:
+            # Ensure template is bytes (not memoryview or other type); bytes pass through uncopied
+            if isinstance(template, memoryview):
+                logger.debug("[FINGERPRINT_UPLOAD] Converting memoryview to bytes")
+                template = template.tobytes()
+            elif not isinstance(template, bytes):
+                logger.debug("[FINGERPRINT_UPLOAD] Converting %s to bytes", type(template))
+                template = bytes(template)
+
             # If using real device and Finger class is available, create Finger object
             if not self.use_mock and Finger is not None:
-                logger.debug(f"[FINGERPRINT_UPLOAD] Using Finger object for real device")
-
-                # Ensure template is bytes (not memoryview or other type)
-                original_type = type(template)
-                if isinstance(template, memoryview):
-                    logger.debug(f"[FINGERPRINT_UPLOAD] Converting memoryview to bytes")
-                    template = template.tobytes()
-                elif not isinstance(template, bytes):
-                    logger.debug(f"[FINGERPRINT_UPLOAD] Converting {original_type} to bytes")
-                    template = bytes(template)
-
-                logger.debug(f"[FINGERPRINT_UPLOAD] Template after conversion: {type(template)}, size: {len(template)}")
+                logger.debug("[FINGERPRINT_UPLOAD] Using Finger object for real device")
 
                 # Create Finger object for pyzk library
                 finger = Finger(uid=uid, fid=temp_id, valid=1, template=template)
-                logger.debug(f"[FINGERPRINT_UPLOAD] Created Finger object: uid={finger.uid}, fid={finger.fid}, valid={finger.valid}")
+                logger.debug("[FINGERPRINT_UPLOAD] Created Finger object: uid=%s, fid=%s, valid=%s", finger.uid, finger.fid, finger.valid)
 
                 result = conn.set_user_template(finger)
-                logger.info(f"[FINGERPRINT_UPLOAD] ✓ Successfully uploaded template for user {uid}, finger {temp_id}")
+                logger.info("[FINGERPRINT_UPLOAD] ✓ Successfully uploaded template for user %s, finger %s", uid, temp_id)
                 return result
             else:
                 # Mock mode or fallback - use direct template
-                logger.debug(f"[FINGERPRINT_UPLOAD] Using direct template (mock mode)")
-
-                if isinstance(template, memoryview):
-                    template = template.tobytes()
-                elif not isinstance(template, bytes):
-                    template = bytes(template)
+                logger.debug("[FINGERPRINT_UPLOAD] Using direct template (mock mode)")
 
                 result = conn.set_user_template(uid, temp_id, valid=1, template=template)
-                logger.info(f"[FINGERPRINT_UPLOAD] ✓ Successfully uploaded template (mock) for user {uid}, finger {temp_id}")
+                logger.info("[FINGERPRINT_UPLOAD] ✓ Successfully uploaded template (mock) for user %s, finger %s", uid, temp_id)
                 return result
 
         except Exception as e:
-            logger.error(f"[FINGERPRINT_UPLOAD] ✗ Failed to upload template for user {uid}, finger {temp_id}: {type(e).__name__}: {str(e)}")
-            logger.exception(f"[FINGERPRINT_UPLOAD] Full traceback:")
+            logger.error("[FINGERPRINT_UPLOAD] ✗ Failed to upload template for user %s, finger %s: %s: %s", uid, temp_id, type(e).__name__, e)
+            logger.exception("[FINGERPRINT_UPLOAD] Full traceback:")
             raise
 
     def delete_fingerprint_template(self, conn, uid, temp_id):
@@ -403,13 +440,13 @@ class ZKDeviceConnector:
         Returns:
             bool: Success status
         """
-        logger.info(f"[FINGERPRINT_DELETE] Deleting template for user {uid}, finger {temp_id}")
+        logger.info("[FINGERPRINT_DELETE] Deleting template for user %s, finger %s", uid, temp_id)
 
         try:
             result = conn.delete_user_template(uid, temp_id)
-            logger.info(f"[FINGERPRINT_DELETE] ✓ Successfully deleted template for user {uid}, finger {temp_id}")
+            logger.info("[FINGERPRINT_DELETE] ✓ Successfully deleted template for user %s, finger %s", uid, temp_id)
             return result
         except Exception as e:
-            logger.error(f"[FINGERPRINT_DELETE] ✗ Error deleting template for user {uid}, finger {temp_id}: {type(e).__name__}: {str(e)}")
-            logger.exception(f"[FINGERPRINT_DELETE] Full traceback:")
+            logger.error("[FINGERPRINT_DELETE] ✗ Error deleting template for user %s, finger %s: %s: %s", uid, temp_id, type(e).__name__, e)
+            logger.exception("[FINGERPRINT_DELETE] Full traceback:")
             raise
@@ -15,6 +15,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     """Admin interface for Employee model"""
     list_display = ['employee_id', 'full_name', 'department', 'user_id', 'is_active', 'synced_to_device', 'device']
     list_filter = ['is_active', 'synced_to_device', 'privilege', 'department', 'device']
+    list_select_related = ['device']
     search_fields = ['employee_id', 'first_name', 'last_name', 'department']
     readonly_fields = ['created_at', 'updated_at']
     inlines = [FingerprintInline]
@@ -41,5 +42,6 @@ class FingerprintAdmin(admin.ModelAdmin):
     """Admin interface for Fingerprint model"""
     list_display = ['employee', 'finger_index', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['employee']
     search_fields = ['employee__first_name', 'employee__last_name', 'employee__employee_id']
     readonly_fields = ['created_at']
@@ -2,11 +2,16 @@
 Management command to sync employees with device
 """
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
+from attendance.reports import invalidate_summary_cache
+from attendance.utils import invalidate_filter_choices
 from employees.models import Employee
 from device.models import Device
 from device.zk_connector import ZKDeviceConnector
 
+BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
     help = 'Sync employees with ZKTeco device'
@@ -57,7 +62,7 @@ class Command(BaseCommand):
             conn.disconnect()
 
             device.last_sync = timezone.now()
-            device.save()
+            device.save(update_fields=['last_sync', 'updated_at'])
 
             self.stdout.write(self.style.SUCCESS('✓ Sync completed successfully'))
 
@@ -67,59 +72,113 @@ class Command(BaseCommand):
     def sync_to_device(self, conn, connector, device):
         """Upload employees to device"""
         self.stdout.write('\nUploading employees to device...')
-        employees = Employee.objects.filter(is_active=True)
-
-        success_count = 0
-        for emp in employees:
-            try:
-                connector.set_user(
-                    conn=conn,
-                    uid=emp.user_id,
-                    name=emp.full_name,
-                    privilege=emp.privilege,
-                    password=emp.password or '',
-                    group_id='0',
-                    user_id=emp.employee_id
-                )
-                emp.synced_to_device = True
-                emp.device = device
-                emp.save()
-                success_count += 1
-                self.stdout.write(f'  ✓ {emp.full_name}')
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'  ✗ {emp.full_name}: {e}'))
-
-        self.stdout.write(self.style.SUCCESS(f'Uploaded {success_count} employees'))
+        employees = Employee.objects.filter(is_active=True).only(
+            'user_id', 'employee_id', 'first_name', 'last_name', 'privilege', 'password'
+        )
+
+        now = timezone.now()
+        synced = []
+        # Keep the device from taking punches while its user table changes
+        connector.disable_device(conn)
+        try:
+            for emp in employees:
+                try:
+                    connector.set_user(
+                        conn=conn,
+                        uid=emp.user_id,
+                        name=emp.full_name,
+                        privilege=emp.privilege,
+                        password=emp.password or '',
+                        group_id='0',
+                        user_id=emp.employee_id
+                    )
+                    emp.synced_to_device = True
+                    emp.device = device
+                    emp.updated_at = now
+                    synced.append(emp)
+                    self.stdout.write(f'  ✓ {emp.full_name}')
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'  ✗ {emp.full_name}: {e}'))
+        finally:
+            connector.enable_device(conn)
+
+        # One UPDATE per batch instead of one per employee
+        Employee.objects.bulk_update(
+            synced, ['synced_to_device', 'device', 'updated_at'], batch_size=BATCH_SIZE
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Uploaded {len(synced)} employees'))
 
     def sync_from_device(self, conn, connector, device):
         """Download employees from device"""
         self.stdout.write('\nDownloading employees from device...')
-        users = connector.get_users(conn)
+        connector.disable_device(conn)
+        try:
+            users = connector.get_users(conn)
+        finally:
+            connector.enable_device(conn)
+
+        # Look up every existing employee in one query, then write the
+        # changes with one bulk_update and one bulk_create
+        uids = [user.uid for user in users]
+        existing = Employee.objects.in_bulk(uids, field_name='user_id')
+        # An employee ID already in the database stays with its current owner,
+        # so a device user only gets one that is free or already its own
+        employee_ids = {user.user_id or f'EMP{user.uid:04d}' for user in users}
+        taken_employee_ids = dict(
+            Employee.objects.filter(employee_id__in=employee_ids)
+            .values_list('employee_id', 'user_id')
+        )
 
-        new_count = 0
-        updated_count = 0
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        synced = []
 
         for user in users:
-            try:
-                employee, created = Employee.objects.update_or_create(
-                    user_id=user.uid,
-                    defaults={
-                        'employee_id': user.user_id or f'EMP{user.uid:04d}',
-                        'first_name': user.name.split()[0] if user.name else f'User{user.uid}',
-                        'last_name': ' '.join(user.name.split()[1:]) if len(user.name.split()) > 1 else '',
-                        'privilege': user.privilege,
-                        'password': user.password or '',
-                        'synced_to_device': True,
-                        'device': device,
-                    }
-                )
-                if created:
-                    new_count += 1
-                    self.stdout.write(f'  + {employee.full_name} (new)')
-                else:
-                    updated_count += 1
-                    self.stdout.write(f'  ↻ {employee.full_name} (updated)')
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'  ✗ {user.name}: {e}'))
-
-        self.stdout.write(self.style.SUCCESS(f'Downloaded: {new_count} new, {updated_count} updated'))
+            employee_id = user.user_id or f'EMP{user.uid:04d}'
+            owner = taken_employee_ids.setdefault(employee_id, user.uid)
+            if owner != user.uid:
+                self.stdout.write(self.style.ERROR(
+                    f'  ✗ {user.name}: employee ID {employee_id} already belongs to user {owner}'
+                ))
+                continue
+
+            employee = existing.get(user.uid)
+            if employee is None:
+                employee = Employee(user_id=user.uid)
+                to_create.append(employee)
+            else:
+                employee.updated_at = now
+                to_update.append(employee)
+            synced.append(employee)
+
+            employee.employee_id = employee_id
+            name_parts = user.name.split() if user.name else []
+            employee.first_name = name_parts[0] if name_parts else f'User{user.uid}'
+            employee.last_name = ' '.join(name_parts[1:])
+            employee.privilege = user.privilege
+            employee.password = user.password or ''
+            employee.synced_to_device = True
+            employee.device = device
+
+        with transaction.atomic():
+            Employee.objects.bulk_update(
+                to_update,
+                ['employee_id', 'first_name', 'last_name', 'privilege', 'password',
+                 'synced_to_device', 'device', 'updated_at'],
+                batch_size=BATCH_SIZE,
+            )
+            Employee.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        # Bulk writes skip post_save, so refresh the cached employee choices and
+        # report summaries (which hold employee names and IDs) here
+        invalidate_filter_choices()
+        invalidate_summary_cache()
+
+        for employee in synced:
+            if employee.user_id in existing:
+                self.stdout.write(f'  ↻ {employee.full_name} (updated)')
+            else:
+                self.stdout.write(f'  + {employee.full_name} (new)')
+
+        self.stdout.write(self.style.SUCCESS(f'Downloaded: {len(to_create)} new, {len(to_update)} updated'))
@@ -65,28 +65,45 @@ class Command(BaseCommand):
         mode = "REAL" if use_real else "MOCK"
         self.stdout.write(f'Mode: {mode}')
 
-        # Execute sync based on direction
-        if direction in ['from', 'both']:
-            self.sync_from_device(connector, device, employees)
+        try:
+            conn = connector.connect()
+        except Exception as e:
+            raise CommandError(f'Error connecting to device: {str(e)}')
 
-        if direction in ['to', 'both']:
-            self.sync_to_device(connector, device, employees)
+        # Execute sync based on direction over a single connection
+        try:
+            if direction in ['from', 'both']:
+                self.sync_from_device(conn, connector, device, employees)
+
+            if direction in ['to', 'both']:
+                self.sync_to_device(conn, connector, device, employees)
+        finally:
+            conn.disconnect()
 
         self.stdout.write(self.style.SUCCESS('✓ Fingerprint sync completed'))
 
-    def sync_from_device(self, connector, device, employees):
+    def sync_from_device(self, conn, connector, device, employees):
         """Download fingerprints from device to database"""
         self.stdout.write('\n--- Downloading fingerprints FROM device ---')
 
         try:
-            conn = connector.connect()
             total_downloaded = 0
 
+            # Fetch every template in one device read rather than ten per employee,
+            # falling back to per-employee reads if the bulk read fails
+            try:
+                templates_by_uid = connector.get_all_templates_bulk(conn)
+            except Exception as e:
+                templates_by_uid = None
+                self.stdout.write(self.style.WARNING(f'Bulk download failed, reading per employee: {str(e)}'))
+
             for employee in employees:
                 self.stdout.write(f'\nEmployee: {employee.full_name} (UID: {employee.user_id})')
 
-                # Download all fingerprint templates (0-9)
-                templates = connector.get_all_fingerprint_templates(conn, employee.user_id)
+                if templates_by_uid is None:
+                    templates = connector.get_all_fingerprint_templates(conn, employee.user_id)
+                else:
+                    templates = templates_by_uid.get(employee.user_id, {})
 
                 if not templates:
                     self.stdout.write('  No fingerprints found on device')
@@ -107,8 +124,6 @@ class Command(BaseCommand):
                         self.stdout.write(f'  ✓ Downloaded: {finger_name} ({len(template_data)} bytes)')
                         total_downloaded += 1
 
-            conn.disconnect()
-
             self.stdout.write(
                 self.style.SUCCESS(f'\n✓ Downloaded {total_downloaded} fingerprint templates')
             )
@@ -116,12 +131,11 @@ class Command(BaseCommand):
         except Exception as e:
             raise CommandError(f'Error downloading fingerprints: {str(e)}')
 
-    def sync_to_device(self, connector, device, employees):
+    def sync_to_device(self, conn, connector, device, employees):
         """Upload fingerprints from database to device"""
         self.stdout.write('\n--- Uploading fingerprints TO device ---')
 
         try:
-            conn = connector.connect()
             total_uploaded = 0
 
             for employee in employees:
@@ -160,8 +174,6 @@ class Command(BaseCommand):
                             self.style.ERROR(f'  ✗ Error uploading fingerprint: {str(e)}')
                         )
 
-            conn.disconnect()
-
             self.stdout.write(
                 self.style.SUCCESS(f'\n✓ Uploaded {total_uploaded} fingerprint templates')
             )
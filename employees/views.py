@@ -228,7 +228,7 @@ def sync_to_device(request):
         conn.disconnect()
 
         device.last_sync = timezone.now()
-        device.save()
+        device.save(update_fields=['last_sync', 'updated_at'])
 
         if success_count > 0:
             messages.success(request, _('Successfully synced %(count)d employees to device') % {'count': success_count})
@@ -269,16 +269,24 @@ def sync_from_device(request):
     try:
         conn = connector.connect()
         users = connector.get_users(conn)
+        # Fetch every template in one device read rather than ten per user,
+        # falling back to per-user reads if the bulk read fails
+        try:
+            templates_by_uid = connector.get_all_templates_bulk(conn)
+        except Exception as e:
+            templates_by_uid = None
+            messages.warning(request, f'Bulk fingerprint download failed, reading per user: {str(e)}')
 
         for user in users:
             try:
+                name_parts = user.name.split() if user.name else []
                 # Try to find existing employee
                 employee, created = Employee.objects.update_or_create(
                     user_id=user.uid,
                     defaults={
                         'employee_id': user.user_id or f'EMP{user.uid:04d}',
-                        'first_name': user.name.split()[0] if user.name else f'User{user.uid}',
-                        'last_name': ' '.join(user.name.split()[1:]) if len(user.name.split()) > 1 else '',
+                        'first_name': name_parts[0] if name_parts else f'User{user.uid}',
+                        'last_name': ' '.join(name_parts[1:]),
                         'privilege': user.privilege,
                         'password': user.password or '',
                         'synced_to_device': True,
@@ -291,7 +299,10 @@ def sync_from_device(request):
                     updated_count += 1
 
                 # Download fingerprint templates for this employee
-                templates = connector.get_all_fingerprint_templates(conn, user.uid)
+                if templates_by_uid is None:
+                    templates = connector.get_all_fingerprint_templates(conn, user.uid)
+                else:
+                    templates = templates_by_uid.get(user.uid, {})
                 for temp_id, template_data in templates.items():
                     Fingerprint.objects.update_or_create(
                         employee=employee,
@@ -309,7 +320,7 @@ def sync_from_device(request):
         conn.disconnect()
 
         device.last_sync = timezone.now()
-        device.save()
+        device.save(update_fields=['last_sync', 'updated_at'])
 
         if success_count > 0:
             messages.success(request, f'Added {success_count} new employees from device')
@@ -404,8 +415,9 @@ def sync_single_employee_from_device(request, pk):
         if device_user:
             # Update employee info
             employee.employee_id = device_user.user_id or employee.employee_id
-            employee.first_name = device_user.name.split()[0] if device_user.name else employee.first_name
-            employee.last_name = ' '.join(device_user.name.split()[1:]) if len(device_user.name.split()) > 1 else employee.last_name
+            name_parts = device_user.name.split() if device_user.name else []
+            employee.first_name = name_parts[0] if name_parts else employee.first_name
+            employee.last_name = ' '.join(name_parts[1:]) if len(name_parts) > 1 else employee.last_name
             employee.privilege = device_user.privilege
             employee.password = device_user.password or ''
             employee.synced_to_device = True
@@ -943,6 +955,11 @@ def import_employees_csv(request):
                         except Device.DoesNotExist:
                             errors.append(f"Row {row_num}: Device '{device_name}' not found")
                             # Continue without device
+                        except Device.MultipleObjectsReturned:
+                            # Devices on the same IP differ only by port
+                            errors.append(
+                                f"Row {row_num}: Several devices use IP '{device_name}', use the device name instead"
+                            )
 
                 # Try to find existing employee by employee_id or user_id
                 employee = None
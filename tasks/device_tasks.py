@@ -4,15 +4,20 @@ These tasks run asynchronously using Django-Q to prevent Gunicorn timeouts.
 """
 
 import logging
+from django.db import transaction
 from django.utils import timezone
 from device.models import Device
 from device.zk_connector import ZKDeviceConnector
 from employees.models import Employee, Fingerprint
 from attendance.models import AttendanceEvent
+from attendance.reports import invalidate_summary_cache
 from .models import TaskProgress
 
 logger = logging.getLogger(__name__)
 
+# Attendance records inserted per bulk_create call
+BATCH_SIZE = 1000
+
 
 def async_sync_employees_to_device(task_id, device_id, user_id):
     """
@@ -53,59 +58,64 @@ def async_sync_employees_to_device(task_id, device_id, user_id):
         users_to_delete = device_user_ids - db_user_ids
         deleted_count = 0
 
-        for i, uid in enumerate(users_to_delete):
-            try:
-                connector.delete_user(conn, uid)
-                # Also delete fingerprints
-                for finger_idx in range(10):
-                    try:
-                        connector.delete_fingerprint_template(conn, uid, finger_idx)
-                    except:
-                        pass
-                deleted_count += 1
-            except Exception as e:
-                task.add_error(f"Failed to delete user {uid}: {str(e)}")
-
-        if deleted_count > 0:
-            task.update_progress(10, message=f"Removed {deleted_count} obsolete users")
-
-        # Upload/update active employees
-        success_count = 0
-        error_count = 0
-
-        for i, emp in enumerate(employees):
-            try:
-                connector.set_user(
-                    conn=conn,
-                    uid=emp.user_id,
-                    name=emp.full_name,
-                    privilege=emp.privilege,
-                    password=emp.password or '',
-                    group_id='0',
-                    user_id=emp.employee_id
-                )
-                emp.synced_to_device = True
-                emp.device = device
-                emp.save()
-                success_count += 1
+        # Keep the device from taking punches while its user table changes
+        connector.disable_device(conn)
+        try:
+            for i, uid in enumerate(users_to_delete):
+                try:
+                    connector.delete_user(conn, uid)
+                    # Also delete fingerprints
+                    for finger_idx in range(10):
+                        try:
+                            connector.delete_fingerprint_template(conn, uid, finger_idx)
+                        except:
+                            pass
+                    deleted_count += 1
+                except Exception as e:
+                    task.add_error(f"Failed to delete user {uid}: {str(e)}")
+
+            if deleted_count > 0:
+                task.update_progress(10, message=f"Removed {deleted_count} obsolete users")
+
+            # Upload/update active employees
+            success_count = 0
+            error_count = 0
+
+            for i, emp in enumerate(employees):
+                try:
+                    connector.set_user(
+                        conn=conn,
+                        uid=emp.user_id,
+                        name=emp.full_name,
+                        privilege=emp.privilege,
+                        password=emp.password or '',
+                        group_id='0',
+                        user_id=emp.employee_id
+                    )
+                    emp.synced_to_device = True
+                    emp.device = device
+                    emp.save()
+                    success_count += 1
 
-                # Update progress
-                current_progress = 10 + i + 1
-                task.update_progress(
-                    current_progress,
-                    message=f"Synced {emp.full_name} ({i+1}/{total_employees})"
-                )
+                    # Update progress
+                    current_progress = 10 + i + 1
+                    task.update_progress(
+                        current_progress,
+                        message=f"Synced {emp.full_name} ({i+1}/{total_employees})"
+                    )
 
-            except Exception as e:
-                error_count += 1
-                task.add_error(f"{emp.full_name}: {str(e)}")
-                logger.error(f"Error syncing employee {emp.full_name}: {str(e)}")
+                except Exception as e:
+                    error_count += 1
+                    task.add_error(f"{emp.full_name}: {str(e)}")
+                    logger.error(f"Error syncing employee {emp.full_name}: {str(e)}")
+        finally:
+            connector.enable_device(conn)
 
         conn.disconnect()
 
         # Update device last sync
         device.last_sync = timezone.now()
-        device.save()
+        device.save(update_fields=['last_sync', 'updated_at'])
 
         # Update task results
         task.success_count = success_count
@@ -157,6 +167,15 @@ def async_sync_employees_from_device(task_id, device_id, user_id):
 
         task.update_progress(15, 15 + total_users * 85 // 100, f"Found {total_users} users")
 
+        # Fetch every template in one device read rather than ten per user,
+        # falling back to per-user reads if the bulk read fails
+        try:
+            templates_by_uid = connector.get_all_templates_bulk(conn)
+        except Exception as e:
+            templates_by_uid = None
+            task.add_error(f"Bulk fingerprint download failed, reading per user: {str(e)}")
+            logger.warning(f"Bulk fingerprint download failed for {device.name}: {str(e)}")
+
         success_count = 0
         updated_count = 0
         error_count = 0
@@ -164,13 +183,14 @@ def async_sync_employees_from_device(task_id, device_id, user_id):
 
         for i, user in enumerate(users):
             try:
+                name_parts = user.name.split() if user.name else []
                 # Create or update employee
                 employee, created = Employee.objects.update_or_create(
                     user_id=user.uid,
                     defaults={
                         'employee_id': user.user_id or f'EMP{user.uid:04d}',
-                        'first_name': user.name.split()[0] if user.name else f'User{user.uid}',
-                        'last_name': ' '.join(user.name.split()[1:]) if len(user.name.split()) > 1 else '',
+                        'first_name': name_parts[0] if name_parts else f'User{user.uid}',
+                        'last_name': ' '.join(name_parts[1:]),
                         'privilege': user.privilege,
                         'password': user.password or '',
                         'synced_to_device': True,
@@ -184,7 +204,10 @@ def async_sync_employees_from_device(task_id, device_id, user_id):
                     updated_count += 1
 
                 # Download fingerprint templates
-                templates = connector.get_all_fingerprint_templates(conn, user.uid)
+                if templates_by_uid is None:
+                    templates = connector.get_all_fingerprint_templates(conn, user.uid)
+                else:
+                    templates = templates_by_uid.get(user.uid, {})
                 for temp_id, template_data in templates.items():
                     Fingerprint.objects.update_or_create(
                         employee=employee,
@@ -211,7 +234,7 @@ def async_sync_employees_from_device(task_id, device_id, user_id):
         conn.disconnect()
 
         device.last_sync = timezone.now()
-        device.save()
+        device.save(update_fields=['last_sync', 'updated_at'])
 
         task.success_count = success_count
         task.error_count = error_count
@@ -265,52 +288,64 @@ def async_download_attendance(task_id, device_id, user_id):
 
         conn.disconnect()
 
+        # Match all employees in a single query
+        user_ids = {record.user_id for record in attendance_records}
+        emp_by_user = Employee.objects.in_bulk(user_ids, field_name='user_id')
+
+        events = [
+            AttendanceEvent(
+                device=device,
+                user_id=record.user_id,
+                timestamp=record.timestamp,
+                employee=emp_by_user.get(record.user_id),
+                punch_type=record.punch,
+                verify_mode=getattr(record, 'status', 0),
+                work_code=0,
+            )
+            for record in attendance_records
+        ]
+
         success_count = 0
         error_count = 0
-        duplicate_count = 0
 
-        for i, record in enumerate(attendance_records):
+        # Insert in batches; duplicates are skipped by the (device, user_id, timestamp)
+        # unique constraint and counted from the row count delta
+        device_events = AttendanceEvent.objects.filter(device=device)
+        for start in range(0, total_records, BATCH_SIZE):
+            batch = events[start:start + BATCH_SIZE]
             try:
-                # Try to match employee
-                employee = None
-                try:
-                    employee = Employee.objects.get(user_id=record.user_id)
-                except Employee.DoesNotExist:
-                    pass
-
-                # Create or skip if duplicate
-                _, created = AttendanceEvent.objects.get_or_create(
-                    device=device,
-                    user_id=record.user_id,
-                    timestamp=record.timestamp,
-                    defaults={
-                        'employee': employee,
-                        'punch_type': record.punch,
-                        'verify_mode': getattr(record, 'status', 0),
-                        'work_code': 0,
-                    }
+                # Each batch commits once; a failed batch rolls back cleanly.
+                # The device row lock keeps other downloads from the same device
+                # out of the count delta, and counting only the batch's time span
+                # keeps the count's cost independent of the device's history.
+                timestamps = [event.timestamp for event in batch]
+                batch_events = device_events.filter(
+                    timestamp__gte=min(timestamps), timestamp__lte=max(timestamps)
                 )
+                with transaction.atomic():
+                    Device.objects.select_for_update().only('pk').get(pk=device.pk)
+                    existing_count = batch_events.count()
+                    AttendanceEvent.objects.bulk_create(batch, ignore_conflicts=True)
+                    success_count += batch_events.count() - existing_count
+            except Exception as e:
+                error_count += len(batch)
+                task.add_error(f"Records {start + 1}-{start + len(batch)}: {str(e)}")
+                logger.error(f"Error importing attendance records: {str(e)}")
 
-                if created:
-                    success_count += 1
-                else:
-                    duplicate_count += 1
+            processed = start + len(batch)
+            task.update_progress(
+                20 + processed,
+                message=f"Processed {processed}/{total_records} records"
+            )
 
-                # Update progress
-                current_progress = 20 + i + 1
-                if (i + 1) % 10 == 0 or i == total_records - 1:
-                    task.update_progress(
-                        current_progress,
-                        message=f"Processed {i+1}/{total_records} records"
-                    )
+        duplicate_count = total_records - success_count - error_count
+        linked_count = AttendanceEvent.link_unmatched_employees(device)
 
-            except Exception as e:
-                error_count += 1
-                task.add_error(f"Record {i+1}: {str(e)}")
-                logger.error(f"Error importing attendance record: {str(e)}")
+        if success_count > 0 or linked_count > 0:
+            invalidate_summary_cache()
 
         device.last_sync = timezone.now()
-        device.save()
+        device.save(update_fields=['last_sync', 'updated_at'])
 
         task.success_count = success_count
         task.error_count = error_count
@@ -80,6 +80,15 @@ DATABASES = {
 }
 
 
+# Cache (Redis when REDIS_URL is set, otherwise per-process local memory)
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [